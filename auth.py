@@ -4,6 +4,8 @@ import json
 
 import os
 USER_DB = os.path.join(os.path.dirname(__file__), "users.json")
+# Comma-separated emails that see the admin-only panels (e.g. diagnostics); none unless configured
+ADMINS = {email.strip() for email in os.environ.get("WORKLENSE_ADMINS", "").split(",") if email.strip()}
 
 def login_form():
     st.markdown("<div class='login-card'>", unsafe_allow_html=True)
@@ -26,6 +28,9 @@ def login_form():
 def is_logged_in():
     return st.session_state.get("logged_in", False)
 
+def is_admin():
+    return is_logged_in() and st.session_state.get("user_email") in ADMINS
+
 def logout():
     st.session_state.logged_in = False
     st.session_state.user_email = ""
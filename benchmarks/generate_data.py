@@ -0,0 +1,197 @@
+# benchmarks/generate_data.py
+"""
+Synthetic input workbooks for benchmarking.
+
+Writes employee_master.xlsx, HRMS_Leave.xlsx and Sales_INR.xlsx with every
+column the loaders type and the reports read, with a consistent org hierarchy
+(areas within zones, departments within functions), plausible dates (exits
+after joining, about a third of employees exited) and free-text skills and
+job roles for the word clouds. Output is reproducible for a given size and
+seed. Sheets are streamed through xlsxwriter's constant_memory mode, so even
+the 1M-employee master is written without holding the workbook in memory.
+
+    python -m benchmarks.generate_data --sizes 1k,10k [--out benchmarks/data]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.excel_export import open_workbook, write_sheet
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), "data")
+CHUNK_ROWS = 50_000
+LEAVES_PER_EMPLOYEE = 4.7  # ratios of the sample workbooks in data/
+SALES_PER_EMPLOYEE = 3.5
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Meera", "Nikhil", "Pooja",
+               "Rahul", "Riya", "Sanjay", "Sneha", "Tanvi", "Varun", "Neha", "Karan", "Priya", "Rohan"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Singh", "Kumar", "Mehta", "Iyer", "Nair", "Reddy", "Das",
+              "Bose", "Joshi", "Kapoor", "Malhotra", "Chopra", "Saxena", "Agarwal", "Bhatia", "Rao", "Pillai"]
+ZONES = {"North": 6, "South": 5, "East": 4, "West": 5}
+FUNCTIONS = {
+    "Operations": ["O&M", "Network Planning", "Metering", "Substations"],
+    "Commercial": ["Billing", "Collections", "Customer Care"],
+    "Finance": ["Accounts", "Treasury", "Audit"],
+    "Human Resources": ["Talent Acquisition", "L&D", "HR Operations"],
+    "IT": ["Applications", "Infrastructure", "SCADA"],
+}
+BANDS = {"B1": ["G1", "G2"], "B2": ["G3", "G4"], "B3": ["G5", "G6"], "B4": ["G7", "G8"], "B5": ["G9"]}
+SKILLS = ["Python", "SCADA", "Excel", "SAP", "Power BI", "Leadership", "Safety", "Negotiation", "AutoCAD",
+          "Project Management", "Customer Service", "Data Analysis", "Relay Testing", "Load Forecasting", None]
+JOB_ROLES = ["Lineman", "Junior Engineer", "Assistant Manager", "Deputy Manager", "Manager", "Senior Manager",
+             "Analyst", "Executive", "Officer", "Engineer Grade II", "Team Lead", "Consultant"]
+QUALIFICATIONS = {"BTech": "Engineering", "Diploma": "Engineering", "MBA": "Management",
+                  "BCom": "Commerce", "CA": "Commerce", "MCA": "Computers", "BSc": "Science"}
+EMPLOYERS = ["NTPC", "Tata Power", "Adani", "Reliance", "L&T", "Siemens", "ABB", "Infosys", "TCS", "None"]
+LEAVE_TYPES = ["Sick Leave", "Casual Leave", "Annual Leave", "Maternity Leave", "Comp Off"]
+
+def _dates(rng, start, end, n):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    return start + pd.to_timedelta(rng.integers(0, (end - start).days + 1, n), unit="D")
+
+def employee_frame(n, seed=0):
+    """``n`` employees with the columns of EMPLOYEE_SCHEMA."""
+    rng = np.random.default_rng(seed)
+
+    def pick(values, p=None):
+        return np.asarray(values, dtype=object)[rng.choice(len(values), n, p=p)]
+
+    zone = pick(list(ZONES), p=[0.3, 0.25, 0.2, 0.25])
+    area_number = rng.integers(0, 1 << 30, n) % pd.Series(zone).map(ZONES).to_numpy() + 1
+    area = (pd.Series(zone) + " Area " + pd.Series(area_number).astype(str)).to_numpy(dtype=object)
+    function = pick(list(FUNCTIONS), p=[0.4, 0.25, 0.12, 0.08, 0.15])
+    department = np.array([FUNCTIONS[f][i % len(FUNCTIONS[f])] for f, i in zip(function, rng.integers(0, 12, n))],
+                          dtype=object)
+    band = pick(list(BANDS), p=[0.35, 0.3, 0.2, 0.1, 0.05])
+    grade = np.array([BANDS[b][i % len(BANDS[b])] for b, i in zip(band, rng.integers(0, 2, n))], dtype=object)
+
+    doj = _dates(rng, "1995-01-01", "2026-03-31", n)
+    dob = doj - pd.to_timedelta(rng.integers(21 * 365, 45 * 365, n), unit="D")
+    tenure_days = rng.integers(90, 20 * 365, n)
+    exited = rng.random(n) < 0.33
+    doe = pd.Series(doj + pd.to_timedelta(tenure_days, unit="D")).where(exited)
+    doe = doe.where(doe <= pd.Timestamp("2026-03-31"))
+    total_exp = rng.gamma(3.0, 3.5, n).round(1)
+    fixed = (rng.lognormal(13.3, 0.5, n) * (1 + pd.Series(band).str[1].astype(int).to_numpy() / 4)).round(-3)
+    variable = (fixed * rng.uniform(0, 0.2, n)).round(-3)
+    qualification = pick(list(QUALIFICATIONS))
+    has_exit = doe.notna().to_numpy()
+
+    df = pd.DataFrame({
+        "employee_id": np.arange(100001, 100001 + n),
+        "employee_name": pd.Series(pick(FIRST_NAMES)) + " " + pd.Series(pick(LAST_NAMES)),
+        "company": pick(["BRPL", "BYPL"], p=[0.6, 0.4]),
+        "employment_type": pick(["Permanent", "Contract", "Trainee"], p=[0.7, 0.25, 0.05]),
+        "business_unit": pick(["Distribution", "Corporate", "Projects"], p=[0.7, 0.15, 0.15]),
+        "zone": zone,
+        "area": area,
+        "cluster": pick([f"Cluster {i}" for i in range(1, 9)]),
+        "location": pick(["Delhi", "Noida", "Gurugram", "Faridabad"], p=[0.7, 0.1, 0.1, 0.1]),
+        "function": function,
+        "department": department,
+        "band": band,
+        "grade": grade,
+        "gender": pick(["Male", "Female", "Other"], p=[0.72, 0.27, 0.01]),
+        "date_of_birth": dob,
+        "date_of_joining": doj,
+        "date_of_exit": doe,
+        "last_promotion": pd.Series(doj + pd.to_timedelta(rng.integers(365, 6 * 365, n), unit="D"))
+                            .where(rng.random(n) < 0.6),
+        "last_transfer": pd.Series(doj + pd.to_timedelta(rng.integers(180, 8 * 365, n), unit="D"))
+                           .where(rng.random(n) < 0.3),
+        "total_exp_yrs": total_exp,
+        "prev_exp_in_yrs": (total_exp * rng.uniform(0, 0.6, n)).round(1),
+        "fixed_ctc_pa": fixed,
+        "variable_ctc_pa": variable,
+        "total_ctc_pa": fixed + variable,
+        "training_hours": rng.integers(0, 80, n),
+        "satisfaction_score": rng.uniform(1, 5, n).round(1),
+        "engagement_score": rng.uniform(1, 5, n).round(1),
+        "rating_25": pick(["Excellent", "Good", "Average", "Poor"], p=[0.15, 0.5, 0.3, 0.05]),
+        "rating_24": pick(["Excellent", "Good", "Average", "Poor"], p=[0.15, 0.5, 0.3, 0.05]),
+        "top_talent": pick(["Yes", "No"], p=[0.1, 0.9]),
+        "succession_ready": pick(["Yes", "No"], p=[0.2, 0.8]),
+        "hiring_source": pick(["Referral", "Job Portal", "Campus", "Consultant", "Internal"]),
+        "highest_qualification": qualification,
+        "qualification_type": pick(["Full Time", "Part Time", "Distance"], p=[0.8, 0.1, 0.1]),
+        "qualification": np.array([QUALIFICATIONS[q] for q in qualification], dtype=object),
+        "employment_sector": pick(["Power", "IT", "Manufacturing", "FMCG", "Fresher"]),
+        "unique_job_role": pick(JOB_ROLES),
+        "exit_type": np.where(has_exit, pick(["Regrettable", "Non-Regrettable", "Retirement"], p=[0.3, 0.6, 0.1]), None),
+        "reason_for_exit": np.where(has_exit, pick(["Better Pay", "Relocation", "Higher Studies", "Career Growth",
+                                                     "Personal", "Superannuation"]), None),
+        "skills_1": pick(SKILLS[:-1]),
+        "skills_2": pick(SKILLS),
+        "skills_3": pick(SKILLS),
+        "competency": pick(["Technical", "Behavioural", "Leadership", "Functional"]),
+        "competency_type": pick(["Core", "Functional", "Leadership"]),
+        "competency_level": pick(["L1", "L2", "L3", "L4"]),
+        "learning_program": pick(["LEAP", "Ignite", "Grid Academy", None]),
+        "previous_employers": pd.Series(pick(EMPLOYERS)) + ", " + pd.Series(pick(EMPLOYERS)),
+        "last_employer": pick(EMPLOYERS),
+    })
+    return df
+
+def leave_frame(employees, seed=0):
+    """Leave records for a sample of ``employees``."""
+    rng = np.random.default_rng(seed + 1)
+    n = int(len(employees) * LEAVES_PER_EMPLOYEE)
+    who = employees.iloc[rng.integers(0, len(employees), n)]
+    start = _dates(rng, "2024-04-01", "2026-03-31", n)
+    days = rng.choice([1, 1, 1, 2, 2, 3, 5], n)
+    return pd.DataFrame({
+        "employee_id": who["employee_id"].to_numpy(),
+        "employee_name": who["employee_name"].to_numpy(),
+        "start_date": start,
+        "end_date": start + pd.to_timedelta(days - 1, unit="D"),
+        "leave_type": np.asarray(LEAVE_TYPES, dtype=object)[rng.choice(len(LEAVE_TYPES), n, p=[0.3, 0.3, 0.3, 0.02, 0.08])],
+        "value": days,
+    })
+
+def sales_frame(n_employees, seed=0):
+    """Sales rows over a cost-center hierarchy that grows with the company."""
+    rng = np.random.default_rng(seed + 2)
+    n = int(n_employees * SALES_PER_EMPLOYEE)
+    centers = [f"BR-{z[:3].upper()}-{i:03d}" for z in ZONES for i in range(max(2, n_employees // 500))]
+    return pd.DataFrame({
+        "cost_center": np.asarray(centers, dtype=object)[rng.integers(0, len(centers), n)],
+        "sale_date": _dates(rng, "2023-04-01", "2026-03-31", n),
+        "sale_amount_inr": rng.integers(50_000, 500_000, n),
+    })
+
+def write_xlsx(df, path, chunk_rows=CHUNK_ROWS):
+    """Stream ``df`` to ``path`` as a single-sheet workbook (atomically)."""
+    tmp_path = path + ".tmp"
+    workbook, formats = open_workbook(tmp_path, constant_memory=True)
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    write_sheet(workbook, "Sheet1", chunks, formats)
+    workbook.close()
+    os.replace(tmp_path, path)
+
+def generate(size, out=DATA_FOLDER, seed=0):
+    """Write the three workbooks for ``size`` ("10k" or a row count) into out/<size>; returns the folder."""
+    n = SIZES.get(str(size).lower()) or int(size)
+    folder = os.path.join(out, str(size).lower())
+    os.makedirs(folder, exist_ok=True)
+    employees = employee_frame(n, seed)
+    write_xlsx(employees, os.path.join(folder, "employee_master.xlsx"))
+    write_xlsx(leave_frame(employees, seed), os.path.join(folder, "HRMS_Leave.xlsx"))
+    write_xlsx(sales_frame(n, seed), os.path.join(folder, "Sales_INR.xlsx"))
+    return folder
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic employee, leave and sales workbooks.")
+    parser.add_argument("--sizes", default="1k,10k", help=f"comma-separated, from {', '.join(SIZES)} or row counts")
+    parser.add_argument("--out", default=DATA_FOLDER, help="parent folder (one subfolder per size)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size in args.sizes.split(","):
+        folder = generate(size.strip(), args.out, args.seed)
+        print(f"{size.strip()}: {folder}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# benchmarks/run.py
+"""
+Benchmark harness: data load, filtering, filter options and every report.
+
+For each size the synthetic workbooks (benchmarks/generate_data.py, generated
+on first use) are copied to a scratch folder and the stages below are timed.
+Reports are rendered headless; Streamlit calls are no-ops outside
+``streamlit run``, but all computation, charts and word clouds still run.
+
+* ``load_all_data (cold)`` / ``(snapshot)`` – data_handler.load_all_data
+  without and with the Parquet snapshots;
+* ``store load`` / ``store attach`` – the DataStore parsing the employee master
+  and publishing it, then a second store attaching to the shared files;
+* ``apply_filters (cold)`` / ``(warm)`` – main.py's filter (bitmap index build
+  plus take, then the take alone);
+* ``get_filter_values`` – the cascading filter options for a selection;
+* ``render <report> (cold)`` / ``(cached)`` – each report with empty per-version
+  and report caches, then a rerun with the same filters.
+
+Each stage reports the median wall time of ``--repeat`` runs and, from one
+extra run under tracemalloc, the peak Python/NumPy allocation. Results can be
+saved as a baseline and later runs compared against it; a stage slower (or
+heavier) than the baseline by more than ``--tolerance`` is flagged and the
+exit status is 1.
+
+    python -m benchmarks.run --sizes 1k,10k [--repeat 3]
+    python -m benchmarks.run --sizes 10k --save-baseline
+    python -m benchmarks.run --sizes 10k --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from benchmarks.generate_data import DATA_FOLDER, SIZES, generate
+from utils.frames import enable_copy_on_write
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+WORKBOOKS = ["employee_master.xlsx", "HRMS_Leave.xlsx", "Sales_INR.xlsx"]
+MIN_SECONDS = 0.005  # differences below this are timer noise
+MIN_MB = 1.0
+
+def reset_caches():
+    """Drop every per-version structure and cached report, as after a restart."""
+    from utils.cube import get_cube
+    from utils.derived_columns import get_derived_columns
+    from utils.employee_index import get_employee_index
+    from utils.facets import get_facet_engine
+    from utils.filter_index import get_filter_index
+    from utils.report_cache import REPORT_CACHE
+    from utils.timeline import get_timeline
+
+    for cached in (get_cube, get_derived_columns, get_employee_index, get_facet_engine, get_filter_index, get_timeline):
+        cached.cache_clear()
+    REPORT_CACHE.clear()
+
+def measure(fn, setup=None, repeat=3):
+    """(median seconds, peak MB) of ``fn()``; ``setup()`` runs untimed before each call."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak / 1e6
+
+def sample_filters(df):
+    """A typical sidebar selection: the two largest zones and bands."""
+    return {column: df[column].value_counts().index[:2].tolist() for column in ("zone", "band")}
+
+def run_size(size, repeat, data_root=DATA_FOLDER):
+    """Time every stage on the ``size`` dataset; returns {stage: {"seconds", "peak_mb"}}."""
+    from data_handler import load_all_data
+    from utils.data_store import DataStore
+    from utils.facets import get_facet_engine
+    from utils.filter_index import FILTER_COLUMNS, get_filter_index
+    from utils.report_registry import REPORT_REGISTRY
+
+    source = os.path.join(data_root, size)
+    if not all(os.path.exists(os.path.join(source, name)) for name in WORKBOOKS):
+        print(f"Generating {size} workbooks in {source} ...", flush=True)
+        generate(size, data_root)
+
+    stages = {}
+
+    def record(stage, fn, setup=None, times=repeat):
+        seconds, peak_mb = measure(fn, setup, times)
+        stages[stage] = {"seconds": round(seconds, 4), "peak_mb": round(peak_mb, 1)}
+        print(f"  {stage:<40} {seconds * 1000:10.1f} ms {peak_mb:9.1f} MB", flush=True)
+
+    with tempfile.TemporaryDirectory(prefix="worklense-bench-") as folder:
+        for name in WORKBOOKS:
+            shutil.copy(os.path.join(source, name), folder)
+
+        def remove_snapshots():
+            for name in os.listdir(folder):
+                if ".snapshot." in name:
+                    os.remove(os.path.join(folder, name))
+
+        def remove_shared():
+            shutil.rmtree(os.path.join(folder, ".shared"), ignore_errors=True)
+
+        # Parsing the Excel files dominates and is identical every time: one run
+        record("load_all_data (cold)", lambda: load_all_data(folder), remove_snapshots, times=1)
+        record("load_all_data (snapshot)", lambda: load_all_data(folder))
+        record("store load", lambda: DataStore(folder).get("employee"), remove_shared)
+        record("store attach", lambda: DataStore(folder).get("employee"))
+
+        store = DataStore(folder)
+        df = store.get("employee")
+        filters = sample_filters(df)
+        selection = {column: filters.get(column, []) for column in FILTER_COLUMNS}
+        record("apply_filters (cold)", lambda: get_filter_index(df).apply(df, filters), reset_caches)
+        record("apply_filters (warm)", lambda: get_filter_index(df).apply(df, filters))
+        record("get_filter_values", lambda: get_facet_engine(df).facets(selection), reset_caches)
+
+        for report in REPORT_REGISTRY.names():
+            info = REPORT_REGISTRY.info(report)
+            module = REPORT_REGISTRY.load(report)
+            frames = {name: store.get(name) for name in info["datasets"]}
+
+            def render():
+                data = dict(frames, employee=get_filter_index(df).apply(df, filters), employee_all=df,
+                            filters=filters)
+                module.render(data)
+
+            record(f"render {info['title']} (cold)", render, reset_caches)
+            record(f"render {info['title']} (cached)", render)
+    return stages
+
+def compare(results, baseline, tolerance):
+    """Stages of ``results`` that regressed against ``baseline``, as printable lines."""
+    regressions = []
+    for size, result in results.items():
+        for stage, current in result["stages"].items():
+            before = baseline.get(size, {}).get("stages", {}).get(stage)
+            if not before:
+                continue
+            slower = current["seconds"] - before["seconds"]
+            heavier = current["peak_mb"] - before["peak_mb"]
+            if slower > MIN_SECONDS and current["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append(f"{size} {stage}: {before['seconds'] * 1000:.1f} -> "
+                                   f"{current['seconds'] * 1000:.1f} ms")
+            if heavier > MIN_MB and current["peak_mb"] > before["peak_mb"] * (1 + tolerance):
+                regressions.append(f"{size} {stage}: {before['peak_mb']:.1f} -> {current['peak_mb']:.1f} MB peak")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data load, filtering and reports on synthetic data.")
+    parser.add_argument("--sizes", default="1k,10k", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (median is reported)")
+    parser.add_argument("--data", default=DATA_FOLDER, help="folder of generated workbooks")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    # Bare-mode Streamlit warns about the missing ScriptRunContext (and deprecations) on every call
+    import streamlit  # noqa: F401  (registers its loggers)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).addFilter(lambda record: record.levelno >= logging.ERROR)
+    warnings.filterwarnings("ignore")
+    enable_copy_on_write()  # as in main.py
+
+    results = {}
+    for size in [s.strip().lower() for s in args.sizes.split(",")]:
+        print(f"{size}:", flush=True)
+        results[size] = {
+            "rows": SIZES.get(size),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "stages": run_size(size, args.repeat, args.data),
+        }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if baseline and not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,195 @@
 import pandas as pd
 from datetime import datetime, date
+import hashlib
+import json
+import logging
 import os
+import threading
+from utils.instrumentation import timer
+from utils.schema import EMPLOYEE_SCHEMA, LEAVE_SCHEMA, SALES_SCHEMA, REQUIRED_COLUMNS, apply_schema
+from utils.versioned import VERSION_ATTR
 
-def load_employee_data(file_path):
-    """Load and clean employee master data with safe column handling."""
-    df = pd.read_excel(file_path)
+logger = logging.getLogger(__name__)
+
+# Typed columnar snapshots are written next to each workbook, e.g.
+# data/employee_master.xlsx.snapshot.parquet (+ .snapshot.json with the
+# workbook signature they were built from).
+SNAPSHOT_SUFFIX = ".snapshot.parquet"
+SNAPSHOT_META_SUFFIX = ".snapshot.json"
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_snapshot_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _tmp_path(path):
+    """A temporary sibling of ``path`` unique to this process and thread."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _write_snapshot_meta(meta_path, meta):
+    """Write the snapshot's signature atomically; log and skip on failure."""
+    tmp_path = _tmp_path(meta_path)
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    except OSError as e:  # read-only or full folder
+        logger.warning("Could not write snapshot signature %s: %s", meta_path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _write_snapshot(df, snapshot_path, meta_path, meta):
+    """Write the Parquet snapshot and its signature atomically; skip on failure."""
+    tmp_path = _tmp_path(snapshot_path)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, snapshot_path)
+    except Exception as e:  # pyarrow missing, mixed-type object column, read-only folder...
+        logger.warning("Could not write snapshot for %s: %s", snapshot_path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    _write_snapshot_meta(meta_path, meta)
+
+def _project(names, columns):
+    """The names among ``names`` whose stripped, lowercased form is in ``columns``."""
+    wanted = set(columns)
+    return [name for name in names if str(name).strip().lower() in wanted]
+
+def _version(digest, columns):
+    """Dataset version of the workbook, distinct for each column projection."""
+    if columns is None:
+        return digest[:16]
+    return f"{digest[:16]}:{hashlib.sha1(repr(sorted(columns)).encode()).hexdigest()[:12]}"
+
+def read_excel_cached(file_path, columns=None):
+    """Read a workbook via its Parquet snapshot, rebuilding the snapshot when the workbook changes.
+
+    The snapshot is reused while the workbook's size, mtime and SHA-256 match the
+    ones recorded when it was built. A workbook that was only touched (same bytes,
+    new mtime) keeps its snapshot and just gets its recorded signature refreshed.
+    The content hash is recorded as the frame's dataset version.
+
+    ``columns`` (normalized, i.e. stripped and lowercased names) limits the frame
+    to those columns; from a snapshot only they are read off disk.
+    """
+    snapshot_path = file_path + SNAPSHOT_SUFFIX
+    meta_path = file_path + SNAPSHOT_META_SUFFIX
+    stat = os.stat(file_path)
+    meta = _read_snapshot_meta(meta_path)
+
+    digest = None
+    if meta and meta.get("size") == stat.st_size and os.path.exists(snapshot_path):
+        digest = file_content_hash(file_path)
+        if meta.get("sha256") == digest:
+            try:
+                read_columns = None
+                if columns is not None:
+                    import pyarrow.parquet as pq
+                    read_columns = _project(pq.read_schema(snapshot_path).names, columns)
+                with timer("read snapshot"):
+                    df = pd.read_parquet(snapshot_path, columns=read_columns)
+            except Exception as e:
+                logger.warning("Ignoring unreadable snapshot %s: %s", snapshot_path, e)
+            else:
+                if meta.get("mtime_ns") != stat.st_mtime_ns:
+                    _write_snapshot_meta(meta_path, {**meta, "mtime_ns": stat.st_mtime_ns})
+                df.attrs[VERSION_ATTR] = _version(digest, columns)
+                return df
+
+    digest = digest or file_content_hash(file_path)
+    with timer("parse excel"):
+        df = pd.read_excel(file_path)
+    _write_snapshot(df, snapshot_path, meta_path, {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest,
+    })
+    if columns is not None:
+        df = df[_project(df.columns, columns)]
+    df.attrs[VERSION_ATTR] = _version(digest, columns)
+    return df
+
+def workbook_columns(file_path):
+    """Normalized column names of a workbook, read from its snapshot's schema when there is one."""
+    try:
+        import pyarrow.parquet as pq
+        names = pq.read_schema(file_path + SNAPSHOT_SUFFIX).names
+    except Exception:
+        names = pd.read_excel(file_path, nrows=0).columns
+    return [str(name).strip().lower() for name in names]
+
+# Derived employee columns and the column each is computed from
+DERIVED_COLUMNS = {"age": "date_of_birth", "tenure": "date_of_joining"}
+
+def _read_typed(file_path, schema, dataset, columns=None):
+    """Read, normalize and type one workbook, limited to ``columns`` (plus its required keys) if given."""
+    if columns is not None:
+        columns = set(columns) | set(REQUIRED_COLUMNS[dataset])
+        columns |= {DERIVED_COLUMNS[c] for c in columns if c in DERIVED_COLUMNS and dataset == "employee"}
+        schema = {column: dtype for column, dtype in schema.items() if column in columns}
+    df = read_excel_cached(file_path, columns)
     df.columns = df.columns.str.strip().str.lower()
-    df.fillna("", inplace=True)
+    with timer("typing"):
+        df, _ = apply_schema(df, schema, dataset, REQUIRED_COLUMNS[dataset])
+    return df
+
+def load_employee_data(file_path, columns=None):
+    """Load and clean employee master data with safe column handling.
+
+    ``columns`` limits the frame to the columns a report declares (None loads
+    every column).
+    """
+    df = _read_typed(file_path, EMPLOYEE_SCHEMA, "employee", columns)
 
-    # Convert dates if columns exist
+    # Derived columns (dates are already typed by the schema)
     if 'date_of_birth' in df.columns:
-        df['date_of_birth'] = pd.to_datetime(df['date_of_birth'], errors='coerce')
-        df['age'] = df['date_of_birth'].apply(lambda dob: calculate_age(dob))
+        df['age'] = compute_age(df['date_of_birth'])
     if 'date_of_joining' in df.columns:
-        df['date_of_joining'] = pd.to_datetime(df['date_of_joining'], errors='coerce')
-        df['tenure'] = df['date_of_joining'].apply(lambda doj: calculate_tenure(doj))
-    if 'date_of_exit' in df.columns:
-        df['date_of_exit'] = pd.to_datetime(df['date_of_exit'], errors='coerce')
+        df['tenure'] = compute_tenure(df['date_of_joining'])
 
     return df
 
-def load_leave_data(file_path):
+def load_leave_data(file_path, columns=None):
     """Load HRMS leave data."""
-    df = pd.read_excel(file_path)
-    df.columns = df.columns.str.strip().str.lower()
-    df.fillna("", inplace=True)
-    return df
+    return _read_typed(file_path, LEAVE_SCHEMA, "leave", columns)
 
-def load_sales_data(file_path):
+def load_sales_data(file_path, columns=None):
     """Load sales INR data."""
-    df = pd.read_excel(file_path)
-    df.columns = df.columns.str.strip().str.lower()
-    df.fillna("", inplace=True)
-    return df
+    return _read_typed(file_path, SALES_SCHEMA, "sales", columns)
+
+def _as_of_timestamp(as_of=None):
+    return pd.Timestamp(date.today()) if as_of is None else pd.Timestamp(as_of)
+
+def compute_age(dob, as_of=None):
+    """Completed years between each date of birth and ``as_of`` (default: today).
+
+    Vectorized over a Series; missing or unparseable dates give <NA>.
+    """
+    dob = pd.to_datetime(dob, errors="coerce")
+    as_of = _as_of_timestamp(as_of)
+    before_birthday = (dob.dt.month > as_of.month) | ((dob.dt.month == as_of.month) & (dob.dt.day > as_of.day))
+    return (as_of.year - dob.dt.year - before_birthday.astype(int)).astype("Int64")
 
-def calculate_age(dob):
-    if pd.isnull(dob): return None
-    today = date.today()
-    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+def years_between(start, as_of=None, year_days=365.25, decimals=None):
+    """Elapsed days from each ``start`` date to ``as_of`` expressed in years of ``year_days``."""
+    start = pd.to_datetime(start, errors="coerce")
+    years = (_as_of_timestamp(as_of) - start).dt.days / year_days
+    return years if decimals is None else years.round(decimals)
 
-def calculate_tenure(doj):
-    if pd.isnull(doj): return None
-    today = date.today()
-    return round((pd.Timestamp(today) - doj).days / 365, 2)
+def compute_tenure(doj, as_of=None):
+    """Tenure in 365-day years, rounded to 2 decimals; missing joining dates give NaN."""
+    return years_between(doj, as_of, year_days=365, decimals=2)
 
 def load_all_data(folder_path):
     """Load all key datasets into a dictionary."""
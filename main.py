@@ -1,14 +1,23 @@
 import streamlit as st
 st.set_page_config(layout="wide")
 
-import importlib.util
 import os
-from auth import login_form, is_logged_in, logout
-
-@st.cache_data
-def load_all_data(path):
-    from data_handler import load_all_data as real_loader
-    return real_loader(path)
+import tempfile
+import pandas as pd
+from auth import login_form, is_admin, is_logged_in, logout
+from utils.filter_index import FILTER_COLUMNS, get_filter_index
+from utils.facets import get_facet_engine
+from utils.report_registry import REPORT_REGISTRY
+from utils.report_cache import load_precomputed, precomputed_path
+from utils.report_compute import employee_columns
+from utils.data_export import EXPORT_FORMATS, export_rows
+from utils.data_store import get_data_store
+from utils.instrumentation import finish_run, percentiles, start_run, timer
+from utils.frames import enable_copy_on_write
+
+# Shared frames are read-only: reports derive new frames and columns instead of
+# mutating them, and copy-on-write turns slices into views rather than copies.
+enable_copy_on_write()
 
 # ✅ Logout if triggered
 if st.query_params.get("logout") == ['true']:
@@ -20,6 +29,9 @@ if not is_logged_in():
     login_form()
     st.stop()
 
+# ✅ Time the stages of this rerun (logged to logs/timings.jsonl; admins see them below)
+trace = start_run()
+
 # ✅ Inject custom CSS
 try:
     with open("style.css") as f:
@@ -42,62 +54,131 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# ✅ Load data
+# ✅ Report selector (reports/ is scanned once; modules are cached until their file changes)
+report_names = REPORT_REGISTRY.names()
+st.sidebar.markdown("### 📊 Select Report")
+selected_report = st.sidebar.selectbox(
+    "Report", report_names, key="report_selector", format_func=REPORT_REGISTRY.title,
+)
+trace.label = selected_report
+
+# ✅ Load data (shared store; workbooks parse on first use and changed ones in
+# data/ are picked up in the background). Prefetch what the report declares,
+# limited to the employee columns it reads plus those the filters and cube need.
 data_folder = "data"
-with st.spinner("Loading data..."):
-    data = load_all_data(data_folder)
+report_columns = {"employee": employee_columns(selected_report)}
+try:
+    with st.spinner("Loading data..."), timer("data load"):
+        store = get_data_store(data_folder)
+        store.prefetch(["employee"] + REPORT_REGISTRY.info(selected_report)["datasets"], report_columns)
+except Exception as e:
+    st.error(f"Data loading failed: {e}")
+    st.stop()
+data = store.snapshot(report_columns)
+# Report results written by precompute.py (read on startup and whenever it reruns)
+load_precomputed(precomputed_path(store.folder))
+if st.session_state.get("data_generation", store.generation) != store.generation:
+    st.toast("Data refreshed from the latest workbooks.")
+st.session_state["data_generation"] = store.generation
 df_emp = data['employee']
 
-# ✅ Load reports
-report_folder = "reports"
-report_files = [f.replace(".py", "") for f in os.listdir(report_folder) if f.endswith(".py")]
-
-# ✅ Report selector
-st.sidebar.markdown("### 📊 Select Report")
-selected_report = st.sidebar.selectbox("Report", report_files, key="report_selector")
-
 # ✅ Filters
 st.sidebar.markdown("### 🧭 Filters")
 
+# Options and counts reflect the selections already made on the other filters
+with timer("filter options"):
+    facets = get_facet_engine(df_emp).facets(
+        {column: st.session_state.get(f"filter_{column}", []) for column in FILTER_COLUMNS}
+    )
+
 def get_filter_values(column):
-    return sorted(df_emp[column].dropna().unique())
+    selected = st.session_state.get(f"filter_{column}", [])
+    return [value for value, count in facets.get(column, {}).items() if count > 0 or value in selected]
+
+def filter_multiselect(label, column):
+    counts = facets.get(column, {})
+    return st.multiselect(
+        label, get_filter_values(column), placeholder="Select...", key=f"filter_{column}",
+        format_func=lambda value: f"{value} ({counts.get(value, 0):,})",
+    )
 
 with st.sidebar:
     col1, col2 = st.columns(2)
     with col1:
-        company = st.multiselect("Company", get_filter_values("company"), placeholder="Select...")
-        business_unit = st.multiselect("Business Unit", get_filter_values("business_unit"), placeholder="Select...")
-        area = st.multiselect("Area", get_filter_values("area"), placeholder="Select...")
-        department = st.multiselect("Department", get_filter_values("department"), placeholder="Select...")
+        company = filter_multiselect("Company", "company")
+        business_unit = filter_multiselect("Business Unit", "business_unit")
+        area = filter_multiselect("Area", "area")
+        department = filter_multiselect("Department", "department")
     with col2:
-        employment_type = st.multiselect("Employment Type", get_filter_values("employment_type"), placeholder="Select...")
-        zone = st.multiselect("Zone", get_filter_values("zone"), placeholder="Select...")
-        function = st.multiselect("Function", get_filter_values("function"), placeholder="Select...")
-        band = st.multiselect("Band", get_filter_values("band"), placeholder="Select...")
+        employment_type = filter_multiselect("Employment Type", "employment_type")
+        zone = filter_multiselect("Zone", "zone")
+        function = filter_multiselect("Function", "function")
+        band = filter_multiselect("Band", "band")
 
 # ✅ Apply filters
-def apply_filters(df):
-    if company: df = df[df['company'].isin(company)]
-    if employment_type: df = df[df['employment_type'].isin(employment_type)]
-    if business_unit: df = df[df['business_unit'].isin(business_unit)]
-    if zone: df = df[df['zone'].isin(zone)]
-    if area: df = df[df['area'].isin(area)]
-    if function: df = df[df['function'].isin(function)]
-    if department: df = df[df['department'].isin(department)]
-    if band: df = df[df['band'].isin(band)]
-    return df
-
-data['employee'] = apply_filters(df_emp)
+filters = {
+    "company": company, "employment_type": employment_type,
+    "business_unit": business_unit, "zone": zone, "area": area,
+    "function": function, "department": department, "band": band,
+}
+
+def apply_filters(df, filters):
+    # Bitmap index built once per dataset version and shared by all sessions
+    with timer("filters"):
+        return get_filter_index(df).apply(df, filters)
+
+# The filtered rows are only taken from the shared frame when a report reads them
+# (cached reports never do; cube queries only for dates the cube can't answer)
+data.defer('employee', lambda: apply_filters(df_emp, filters))
+data['employee_all'] = df_emp
+data['filters'] = filters
+
+# ✅ Export the filtered rows (written in chunks to a temp file, not built in memory).
+# The full-width frame is only loaded when the export needs columns the report doesn't.
+with st.sidebar.expander("⬇️ Export Filtered Employees"):
+    export_columns = st.multiselect("Columns", store.columns("employee"), placeholder="All columns", key="export_columns")
+    export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+    if st.button("Prepare Export", key="export_prepare"):
+        export_spec = EXPORT_FORMATS[export_format]
+        with tempfile.TemporaryDirectory() as export_dir:
+            export_path = os.path.join(export_dir, f"employees.{export_spec['ext']}")
+            with st.spinner("Exporting..."), timer("data export"), open(export_path, "wb") as export_file:
+                export_source = df_emp
+                if not export_columns or not set(export_columns) <= set(df_emp.columns):
+                    export_source = store.get("employee")
+                row_count = export_rows(export_source, filters, export_columns, export_spec["ext"], export_file)
+            with open(export_path, "rb") as export_file:
+                st.download_button(
+                    f"Download {row_count:,} rows", export_file,
+                    file_name=os.path.basename(export_path), mime=export_spec["mime"],
+                )
 
 # ✅ Load and render report
 try:
-    report_path = os.path.join(report_folder, f"{selected_report}.py")
-    spec = importlib.util.spec_from_file_location("report_module", report_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    module.render(data)
+    with timer("report import"):
+        module = REPORT_REGISTRY.load(selected_report)
+    with timer(f"render {REPORT_REGISTRY.title(selected_report)}"):
+        module.render(data)
 except Exception as e:
     st.error(f"Failed to load report: {e}")
 
+stages = finish_run(trace)
+
+# ✅ Diagnostics (admins only): this rerun's stage breakdown and the rolling percentiles
+if is_admin():
+    with st.sidebar.expander("🩺 Diagnostics"):
+        st.caption(f"This rerun: {stages['total'] * 1000:,.0f} ms")
+        st.dataframe(pd.DataFrame({
+            "Stage": ["\u2003" * path.count("/") + path.rsplit("/", 1)[-1] for path in stages],
+            "ms": [round(seconds * 1000, 1) for seconds in stages.values()],
+        }), hide_index=True)
+        if trace.counters:
+            st.caption(" · ".join(f"{name}: {value:,}" for name, value in sorted(trace.counters.items())))
+        st.caption("Last reruns (ms)")
+        st.dataframe(pd.DataFrame([
+            {"Stage": stage, "Runs": p["n"], "p50": round(p["p50"] * 1000, 1), "p95": round(p["p95"] * 1000, 1)}
+            for stage, p in percentiles().items()
+        ]), hide_index=True)
+
 # ✅ Footer
 st.markdown("<div class='custom-footer'></div>", unsafe_allow_html=True)
\ No newline at end of file
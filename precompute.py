@@ -0,0 +1,126 @@
+# precompute.py
+"""
+Precompute report results for the dashboard.
+
+Runs the headless compute() of every report (utils/report_compute.py) for a
+set of filter combinations in a process pool and writes the results to the
+folder the dashboard preloads into its report cache (.precomputed in the
+``--data`` folder, ``WORKLENSE_PRECOMPUTED`` to move it). The combinations are:
+
+* no filters;
+* each single value of every column in ``--by``;
+* every selection ({column: [values]}) in the JSON list given by ``--filters``.
+
+The employee master is parsed once, in this process, and published as shared
+memory-mapped files; the workers attach to them. Rerun after the workbooks
+change: results of an older dataset version are never looked up.
+
+    python precompute.py [--by company,zone] [--filters selections.json] [--workers 4]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.filter_index import FILTER_COLUMNS
+from utils.frames import enable_copy_on_write
+
+logger = logging.getLogger("precompute")
+
+_store = None  # the worker process's DataStore
+
+def _quiet_streamlit():
+    """Bare-mode Streamlit warns about the missing ScriptRunContext on every call."""
+    import streamlit  # noqa: F401  (registers its loggers)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).addFilter(lambda record: record.levelno >= logging.ERROR)
+
+def _init_worker(folder, shared_folder):
+    global _store
+    from utils.data_store import DataStore
+
+    enable_copy_on_write()  # as in main.py
+    _quiet_streamlit()
+    _store = DataStore(folder, shared_folder=shared_folder)
+
+def _compute(report, filters, as_of):
+    """(cache key, result) of one report and selection, in a worker."""
+    from utils.report_compute import compute_report, employee_columns, result_key
+
+    employee = _store.get("employee", employee_columns(report))
+    return result_key(report, employee, filters, as_of), compute_report(report, employee, filters, as_of)
+
+def filter_combinations(df, by=(), selections=()):
+    """The unfiltered selection, one per value of each ``by`` column, then ``selections``."""
+    combinations = [{}]
+    for column in by:
+        if column not in df.columns:
+            logger.warning("Skipping unknown filter column %s", column)
+            continue
+        values = df[column].dropna().unique().tolist()
+        combinations += [{column: [value]} for value in sorted(values, key=str)]
+    combinations += [dict(selection) for selection in selections]
+    return combinations
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute report results for common filter selections.")
+    parser.add_argument("--data", default="data", help="folder of the workbooks")
+    parser.add_argument("--by", default="company,zone",
+                        help=f"filter columns to precompute each value of (from {', '.join(FILTER_COLUMNS)}; '' for none)")
+    parser.add_argument("--filters", help="JSON file with a list of selections, e.g. [{\"zone\": [\"North\"], \"band\": [\"B1\"]}]")
+    parser.add_argument("--as-of", help="as-of date (default: each report's own, which the dashboard uses)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="results folder (default: .precomputed in the data folder, which the dashboard reads)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    _quiet_streamlit()
+    enable_copy_on_write()
+
+    from utils.data_store import DataStore
+    from utils.report_cache import precomputed_path, save_precomputed
+    from utils.report_compute import employee_columns, headless_reports
+
+    selections = []
+    if args.filters:
+        with open(args.filters) as f:
+            selections = json.load(f)
+    by = [column.strip() for column in args.by.split(",") if column.strip()]
+    output = args.output or precomputed_path(args.data)
+
+    # Parse (and share) each projection the reports need before the workers start
+    store = DataStore(args.data).check()
+    reports = headless_reports()
+    if not reports:
+        logger.info("No report defines compute(); nothing to precompute")
+        return 0
+    for report in reports:
+        store.get("employee", employee_columns(report))
+    combinations = filter_combinations(store.get("employee", employee_columns(reports[0])), by, selections)
+    tasks = [(report, selection) for report in reports for selection in combinations]
+    logger.info("%d reports x %d selections on %d workers", len(reports), len(combinations), args.workers)
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(store.folder, store.shared.folder)) as pool:
+        futures = [pool.submit(_compute, report, selection, args.as_of) for report, selection in tasks]
+        for (report, selection), future in zip(tasks, futures):
+            try:
+                key, result = future.result()
+            except Exception as e:
+                logger.warning("%s %s failed: %s", report, selection, e)
+                continue
+            results[key] = result
+
+    save_precomputed(results, output)
+    logger.info("Wrote %d results to %s in %.1f s", len(results), output, time.perf_counter() - start)
+    return 0 if len(results) == len(tasks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,35 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import base64
-from io import BytesIO
-from theme_handler import selected_theme
+from typing import TYPE_CHECKING
+from theme_handler import inject_report_style, selected_theme
 from utils.formatting import format_in_indian_style
-from pandas import ExcelWriter
-
-# === Load Report Style ===
-with open("utils/report_style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+from utils.frames import count_values, counts_frame
+from utils.cube import hr_slice
+from utils.report_cache import cached_report
+from utils.filter_index import filtered_count
+from utils.excel_export import excel_download
+from utils.instrumentation import timer
+from utils import wordclouds
+from utils.derived_columns import get_derived_columns
+
+REPORT_INFO = {
+    "title": "Joiners Snapshot",
+    "datasets": ["employee"],
+    "columns": [
+        "date_of_joining", "date_of_exit", "date_of_birth", "gender", "zone", "total_ctc_pa",
+        "total_exp_yrs", "hiring_source", "highest_qualification", "employment_sector",
+        "unique_job_role",
+    ],
+    "lazy_imports": {"px": "plotly.express"},
+}
+
+if TYPE_CHECKING:  # bound lazily by the report registry from REPORT_INFO["lazy_imports"]
+    import plotly.express as px
+
+# Cache name and as-of date of compute(), shared with the headless API (utils/report_compute.py)
+REPORT_KEY = "joiners_snapshot"
+AS_OF = pd.Timestamp("2025-04-30")
 
 # === KPI Card Formatter ===
 def kpi(label, value):
@@ -24,124 +40,123 @@ def kpi(label, value):
     </div>
     """
 
-# === Word Cloud ===
-def generate_wordcloud(data):
-    text = ' '.join(data.dropna().astype(str).tolist())
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-    buffer = BytesIO()
-    plt.figure(figsize=(6, 3))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    img_str = base64.b64encode(buffer.read()).decode()
-    plt.close()
-    return f'<img src="data:image/png;base64,{img_str}" width="100%">'
-
-def render(data_frames):
-    selected_theme()
-
-    df = data_frames.get("employee", pd.DataFrame())
-    if df.empty:
-        st.warning("Employee data not available.")
-        return
-
-    today = pd.to_datetime("2025-04-30")
+def compute(data_frames, today):
+    """KPIs and chart frames for the New Joinee Snapshot (FY starting April 2025)."""
+    df = data_frames["employee"]  # typed by the loader; read-only
     fy_start = pd.to_datetime("2025-04-01")
     fy_end = pd.to_datetime("2026-03-31")
 
-    df["date_of_joining"] = pd.to_datetime(df["date_of_joining"], errors="coerce")
-    df["date_of_birth"] = pd.to_datetime(df["date_of_birth"], errors="coerce")
-    df["total_exp_yrs"] = pd.to_numeric(df["total_exp_yrs"], errors="coerce")
-    df["total_ctc_pa"] = pd.to_numeric(df["total_ctc_pa"], errors="coerce")
+    df_joiners = df[(df["date_of_joining"] >= fy_start) & (df["date_of_joining"] <= fy_end)]
+    derived = get_derived_columns(data_frames.get("employee_all", df))
+    joiner_age = derived.get("age_years", today, rows=df_joiners)
+
+    # Counts by dimension come from the HR cube; the remaining measures need the joiner rows
+    cube = hr_slice(data_frames, today)
+    joiner_genders = cube.events_by("gender", fy_start, fy_end).groupby(lambda g: str(g).title()).sum()
+    joiner_zones = cube.events_by("zone", fy_start, fy_end)
+
+    total_joiners = int(cube.joins(fy_start, fy_end)[0])
+    male_count = int(joiner_genders.get("Male", 0))
+    female_count = int(joiner_genders.get("Female", 0))
+    result = {
+        "total_joiners": total_joiners,
+        "avg_age_joiners": joiner_age.mean(),
+        "avg_experience_joiners": df_joiners["total_exp_yrs"].mean(),
+        "avg_ctc_joiners": df_joiners["total_ctc_pa"].mean() / 1e5,
+        "percentage_freshers": df_joiners["total_exp_yrs"].lt(1).sum() / total_joiners * 100 if total_joiners > 0 else 0,
+        "gender_ratio": f"{male_count}:{female_count}" if female_count != 0 else "All Male",
+        "top_source": df_joiners["hiring_source"].mode()[0] if not df_joiners["hiring_source"].dropna().empty else "N/A",
+        "top_zone": joiner_zones.idxmax() if not joiner_zones.empty else "N/A",
+    }
 
-    df_joiners = df[(df["date_of_joining"] >= fy_start) & (df["date_of_joining"] <= fy_end)].copy()
-    df_joiners["age"] = ((today - df_joiners["date_of_birth"]).dt.days / 365.25).round(1)
+    # === Chart Data Prep ===
+    result["hiring_source_summary"] = count_values(df_joiners['hiring_source'], ['Source', 'Count'])
 
-    total_joiners = df_joiners.shape[0]
-    avg_age_joiners = df_joiners["age"].mean()
-    avg_experience_joiners = df_joiners["total_exp_yrs"].mean()
-    avg_ctc_joiners = df_joiners["total_ctc_pa"].mean() / 1e5
-    percentage_freshers = df_joiners[df_joiners["total_exp_yrs"] < 1].shape[0] / total_joiners * 100 if total_joiners > 0 else 0
+    result["qualification_summary"] = count_values(df_joiners['highest_qualification'], ['Qualification', 'Count'])
 
-    male_count = df_joiners[df_joiners["gender"].str.lower() == "male"].shape[0]
-    female_count = df_joiners[df_joiners["gender"].str.lower() == "female"].shape[0]
-    gender_ratio = f"{male_count}:{female_count}" if female_count != 0 else "All Male"
+    result["gender_summary"] = counts_frame(joiner_genders, ['Gender', 'Count'])
 
-    top_source = df_joiners["hiring_source"].mode()[0] if not df_joiners["hiring_source"].dropna().empty else "N/A"
-    top_zone = df_joiners["zone"].mode()[0] if not df_joiners["zone"].dropna().empty else "N/A"
+    result["sector_summary"] = count_values(df_joiners['employment_sector'], ['Sector', 'Count'])
 
-    st.markdown("<h2 style='text-align: left;'>New Joinee Snapshot</h2>", unsafe_allow_html=True)
-    col1, col2, col3, col4 = st.columns(4)
-    with col1: st.markdown(kpi("Total New Joiners", format_in_indian_style(total_joiners)), unsafe_allow_html=True)
-    with col2: st.markdown(kpi("Average Age", f"{avg_age_joiners:.1f} yrs"), unsafe_allow_html=True)
-    with col3: st.markdown(kpi("Average Experience", f"{avg_experience_joiners:.1f} yrs"), unsafe_allow_html=True)
-    with col4: st.markdown(kpi("Average CTC", f"₹ {avg_ctc_joiners:.1f} L"), unsafe_allow_html=True)
-
-    col5, col6, col7, col8 = st.columns(4)
-    with col5: st.markdown(kpi("Percentage of Freshers", f"{percentage_freshers:.1f}%"), unsafe_allow_html=True)
-    with col6: st.markdown(kpi("Male to Female Ratio", gender_ratio), unsafe_allow_html=True)
-    with col7: st.markdown(kpi("Top Hiring Source", top_source), unsafe_allow_html=True)
-    with col8: st.markdown(kpi("Top Hiring Zone", top_zone), unsafe_allow_html=True)
+    exp_bins = [0, 1, 3, 5, 10, float('inf')]
+    exp_labels = ['<1 Yr', '1–3 Yrs', '3–5 Yrs', '5–10 Yrs', '10+ Yrs']
+    exp_range = pd.cut(df_joiners['total_exp_yrs'], bins=exp_bins, labels=exp_labels, right=False)
+    exp_summary = exp_range.value_counts().reindex(exp_labels).reset_index()
+    exp_summary.columns = ['Experience Range', 'Count']
+    result["exp_summary"] = exp_summary
 
-    # === Chart Data Prep ===
-    hiring_source_summary = df_joiners['hiring_source'].value_counts().reset_index()
-    hiring_source_summary.columns = ['Source', 'Count']
+    result["job_roles"] = df_joiners['unique_job_role'].dropna().astype(str)
+    result["job_role_terms"] = wordclouds.term_frequencies(result["job_roles"])
+    return result
 
-    qualification_summary = df_joiners['highest_qualification'].value_counts().reset_index()
-    qualification_summary.columns = ['Qualification', 'Count']
+def render(data_frames):
+    inject_report_style()
+    selected_theme()
 
-    gender_summary = df_joiners['gender'].str.title().value_counts().reset_index()
-    gender_summary.columns = ['Gender', 'Count']
+    if not filtered_count(data_frames):
+        st.warning("Employee data not available.")
+        return
 
-    sector_summary = df_joiners['employment_sector'].value_counts().reset_index()
-    sector_summary.columns = ['Sector', 'Count']
+    result = cached_report(REPORT_KEY, data_frames, AS_OF, compute)
+    hiring_source_summary = result["hiring_source_summary"]
+    qualification_summary = result["qualification_summary"]
+    gender_summary = result["gender_summary"]
+    sector_summary = result["sector_summary"]
+    exp_summary = result["exp_summary"]
+    job_roles = result["job_roles"]
+    # Rendered off-thread while the charts below are drawn
+    job_role_cloud = wordclouds.submit(result["job_role_terms"])
 
-    exp_bins = [0, 1, 3, 5, 10, float('inf')]
-    exp_labels = ['<1 Yr', '1–3 Yrs', '3–5 Yrs', '5–10 Yrs', '10+ Yrs']
-    df_joiners['Exp Range'] = pd.cut(df_joiners['total_exp_yrs'], bins=exp_bins, labels=exp_labels, right=False)
-    exp_summary = df_joiners['Exp Range'].value_counts().reindex(exp_labels).reset_index()
-    exp_summary.columns = ['Experience Range', 'Count']
+    st.markdown("<h2 style='text-align: left;'>New Joinee Snapshot</h2>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.markdown(kpi("Total New Joiners", format_in_indian_style(result["total_joiners"])), unsafe_allow_html=True)
+    with col2: st.markdown(kpi("Average Age", f"{result['avg_age_joiners']:.1f} yrs"), unsafe_allow_html=True)
+    with col3: st.markdown(kpi("Average Experience", f"{result['avg_experience_joiners']:.1f} yrs"), unsafe_allow_html=True)
+    with col4: st.markdown(kpi("Average CTC", f"₹ {result['avg_ctc_joiners']:.1f} L"), unsafe_allow_html=True)
 
-    job_roles = df_joiners['unique_job_role'].dropna().astype(str)
+    col5, col6, col7, col8 = st.columns(4)
+    with col5: st.markdown(kpi("Percentage of Freshers", f"{result['percentage_freshers']:.1f}%"), unsafe_allow_html=True)
+    with col6: st.markdown(kpi("Male to Female Ratio", result["gender_ratio"]), unsafe_allow_html=True)
+    with col7: st.markdown(kpi("Top Hiring Source", result["top_source"]), unsafe_allow_html=True)
+    with col8: st.markdown(kpi("Top Hiring Zone", result["top_zone"]), unsafe_allow_html=True)
 
     # === Charts ===
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("### 📌 Hiring Source Distribution")
-        fig1 = px.pie(hiring_source_summary, names='Source', values='Count', hole=0.4)
-        fig1.update_layout(height=400)
-        st.plotly_chart(fig1, use_container_width=True)
-    with col2:
-        st.markdown("### 🎓 Qualification Distribution")
-        fig2 = px.pie(qualification_summary, names='Qualification', values='Count', hole=0.4)
-        fig2.update_layout(height=400)
-        st.plotly_chart(fig2, use_container_width=True)
-
-    col3, col4 = st.columns(2)
-    with col3:
-        st.markdown("### 👥 Gender Split of Joiners")
-        fig3 = px.pie(gender_summary, names='Gender', values='Count')
-        fig3.update_layout(height=400)
-        st.plotly_chart(fig3, use_container_width=True)
-    with col4:
-        st.markdown("### 🏢 Employment Sector Distribution")
-        fig4 = px.bar(sector_summary, x='Sector', y='Count', text='Count')
-        fig4.update_traces(textposition='outside')
-        fig4.update_layout(height=400, yaxis_range=[0, sector_summary['Count'].max() * 1.2])
-        st.plotly_chart(fig4, use_container_width=True)
-
-    col5, col6 = st.columns(2)
-    with col5:
-        st.markdown("### 🧭 Experience Range of Joiners")
-        fig5 = px.bar(exp_summary, x='Experience Range', y='Count', text='Count')
-        fig5.update_traces(textposition='outside')
-        fig5.update_layout(height=400, yaxis_range=[0, exp_summary['Count'].max() * 1.2])
-        st.plotly_chart(fig5, use_container_width=True)
-    with col6:
-        st.markdown("### 🧠 Unique Job Roles Hired")
-        st.markdown(generate_wordcloud(job_roles), unsafe_allow_html=True)
+    with timer("charts"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### 📌 Hiring Source Distribution")
+            fig1 = px.pie(hiring_source_summary, names='Source', values='Count', hole=0.4)
+            fig1.update_layout(height=400)
+            st.plotly_chart(fig1, use_container_width=True)
+        with col2:
+            st.markdown("### 🎓 Qualification Distribution")
+            fig2 = px.pie(qualification_summary, names='Qualification', values='Count', hole=0.4)
+            fig2.update_layout(height=400)
+            st.plotly_chart(fig2, use_container_width=True)
+
+        col3, col4 = st.columns(2)
+        with col3:
+            st.markdown("### 👥 Gender Split of Joiners")
+            fig3 = px.pie(gender_summary, names='Gender', values='Count')
+            fig3.update_layout(height=400)
+            st.plotly_chart(fig3, use_container_width=True)
+        with col4:
+            st.markdown("### 🏢 Employment Sector Distribution")
+            fig4 = px.bar(sector_summary, x='Sector', y='Count', text='Count')
+            fig4.update_traces(textposition='outside')
+            fig4.update_layout(height=400, yaxis_range=[0, sector_summary['Count'].max() * 1.2])
+            st.plotly_chart(fig4, use_container_width=True)
+
+        col5, col6 = st.columns(2)
+        with col5:
+            st.markdown("### 🧭 Experience Range of Joiners")
+            fig5 = px.bar(exp_summary, x='Experience Range', y='Count', text='Count')
+            fig5.update_traces(textposition='outside')
+            fig5.update_layout(height=400, yaxis_range=[0, exp_summary['Count'].max() * 1.2])
+            st.plotly_chart(fig5, use_container_width=True)
+        with col6:
+            st.markdown("### 🧠 Unique Job Roles Hired")
+            wordclouds.show(job_role_cloud)
 
     # === Excel Download ===
     download_data = {
@@ -153,14 +168,4 @@ def render(data_frames):
         "Job Roles": pd.DataFrame({'Job Roles': job_roles})
     }
 
-    def prepare_download_excel(data_dict):
-        output = BytesIO()
-        with ExcelWriter(output, engine="xlsxwriter") as writer:
-            for sheet_name, df_sheet in data_dict.items():
-                df_sheet.to_excel(writer, sheet_name=sheet_name[:31], index=False)
-        output.seek(0)
-        return output.read()
-
-    excel_file = prepare_download_excel(download_data)
-    with st.expander("📥 Download Chart Data (Excel)"):
-        st.download_button("Download All Chart Data", data=excel_file, file_name="Joiners_Charts.xlsx")
+    excel_download(download_data, "Joiners_Charts.xlsx", key="joiners_snapshot")
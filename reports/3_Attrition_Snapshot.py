@@ -1,17 +1,36 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import base64
-from io import BytesIO
-from theme_handler import selected_theme
+from typing import TYPE_CHECKING
+from theme_handler import inject_report_style, selected_theme
 from utils.formatting import format_in_indian_style
-
-# === Load Report Style ===
-with open("utils/report_style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+from utils.frames import count_values, counts_frame
+from utils.cube import hr_slice
+from utils.report_cache import cached_report
+from utils.filter_index import filtered_count
+from utils.derived_columns import get_derived_columns
+from utils.excel_export import excel_download
+from utils.instrumentation import timer
+from utils import wordclouds
+from utils.timeline import fiscal_years
+
+REPORT_INFO = {
+    "title": "Attrition Snapshot",
+    "datasets": ["employee"],
+    "columns": [
+        "date_of_joining", "date_of_exit", "gender", "zone", "total_ctc_pa", "exit_type",
+        "rating_25", "top_talent", "reason_for_exit", "skills_1", "skills_2", "skills_3",
+        "competency",
+    ],
+    "lazy_imports": {"px": "plotly.express"},
+}
+
+if TYPE_CHECKING:  # bound lazily by the report registry from REPORT_INFO["lazy_imports"]
+    import plotly.express as px
+
+# Cache name and as-of date of compute(), shared with the headless API (utils/report_compute.py)
+REPORT_KEY = "attrition_snapshot"
+AS_OF = pd.Timestamp("2025-04-30")
 
 def kpi(label, value):
     return f"""
@@ -21,154 +40,150 @@ def kpi(label, value):
     </div>
     """
 
-def render(data_frames):
-    selected_theme()
-    df = data_frames.get("employee", pd.DataFrame())
-    if df.empty:
-        st.warning("Employee data not available.")
-        return
+def compute(data_frames, today):
+    """KPIs and chart frames for the Attrition Snapshot (FY starting April 2025)."""
+    df = data_frames["employee"]  # typed by the loader; read-only
+    fy_start = pd.to_datetime("2025-04-01")
+    fy_end = pd.to_datetime("2026-03-31")
 
-    df["date_of_joining"] = pd.to_datetime(df["date_of_joining"], errors="coerce")
-    df["date_of_exit"] = pd.to_datetime(df["date_of_exit"], errors="coerce")
+    df_exits = df[
+        (df["date_of_exit"] >= fy_start) &
+        (df["date_of_exit"] <= fy_end)
+    ]
+
+    # Headcount, exit counts and exits by zone/gender come from the HR cube
+    cube = hr_slice(data_frames, today)
+    fy_summary = cube.summary(fiscal_years(2021, 2025))
+    opening_hc = int(fy_summary["Opening"].iloc[-1])
+    closing_hc = int(fy_summary["Closing"].iloc[-1])
+    exit_zones = cube.events_by("zone", fy_start, fy_end, measure="exits")
+    exit_genders = cube.events_by("gender", fy_start, fy_end, measure="exits").groupby(lambda g: str(g).title()).sum()
 
-    st.markdown("<h2 style='text-align: left;'>Attrition Snapshot</h2>", unsafe_allow_html=True)
+    avg_hc = (opening_hc + closing_hc) / 2 if (opening_hc + closing_hc) > 0 else 1
 
-    df_exits = df[
-        (df["date_of_exit"] >= pd.to_datetime("2025-04-01")) &
-        (df["date_of_exit"] <= pd.to_datetime("2026-03-31"))
-    ].copy()
+    total_exits = int(fy_summary["Exits"].iloc[-1])
+    derived = get_derived_columns(data_frames.get("employee_all", df))
+    exit_tenure = derived.get("exit_tenure", rows=df_exits)
+
+    result = {
+        "attrition_pct": (total_exits / avg_hc) * 100 if avg_hc > 0 else 0,
+        "regrettable_pct": df_exits[df_exits["exit_type"].str.lower() == "regrettable"].shape[0] / avg_hc * 100,
+        "non_regrettable_pct": df_exits[df_exits["exit_type"].str.lower() == "non-regrettable"].shape[0] / avg_hc * 100,
+        "retirement_pct": df_exits[df_exits["exit_type"].str.lower() == "retirement"].shape[0] / avg_hc * 100,
+        "avg_tenure_exited": exit_tenure.mean(),
+        "top_exit_region": exit_zones.idxmax() if not exit_zones.empty else "N/A",
+        "high_perf_attrition_pct": df_exits[df_exits["rating_25"].str.lower() == "excellent"].shape[0] / avg_hc * 100,
+        "top_talent_attrition_pct": df_exits[df_exits["top_talent"].str.lower() == "yes"].shape[0] / avg_hc * 100,
+    }
 
-    opening_hc = df[
-        (df["date_of_joining"] <= pd.to_datetime("2025-04-01")) &
-        ((df["date_of_exit"].isna()) | (df["date_of_exit"] > pd.to_datetime("2025-04-01")))
-    ].shape[0]
+    # === Chart Data ===
+    exits_by_fy = derived.get("fy_exit", rows=df).value_counts().reindex(fy_summary["Period"], fill_value=0)
+    result["trend_summary"] = pd.DataFrame({"FY": fy_summary["Period"], "Exits": exits_by_fy.to_numpy()})
+    result["exit_type_summary"] = count_values(df_exits["exit_type"], ["Exit Type", "Count"])
 
-    closing_hc = df[
-        (df["date_of_joining"] <= pd.to_datetime("2026-03-31")) &
-        ((df["date_of_exit"].isna()) | (df["date_of_exit"] > pd.to_datetime("2026-03-31")))
-    ].shape[0]
+    bins = [0, 1, 3, 5, 10, float("inf")]
+    labels = ["<1", "1–3", "3–5", "5–10", "10+"]
+    tenure_bucket = pd.cut(exit_tenure, bins=bins, labels=labels, right=False)
+    tenure_summary = tenure_bucket.value_counts().reindex(labels).reset_index()
+    tenure_summary.columns = ["Bucket", "Count"]
+    result["tenure_summary"] = tenure_summary
 
-    avg_hc = (opening_hc + closing_hc) / 2 if (opening_hc + closing_hc) > 0 else 1
+    result["gender_summary"] = counts_frame(exit_genders, ["Gender", "Count"])
+    result["rating_summary"] = count_values(df_exits["rating_25"], ["Rating", "Count"])
+    result["reason_summary"] = count_values(df_exits["reason_for_exit"], ["Reason", "Count"])
 
-    total_exits = df_exits.shape[0]
-    attrition_pct = (total_exits / avg_hc) * 100 if avg_hc > 0 else 0
-    regrettable_pct = df_exits[df_exits["exit_type"].str.lower() == "regrettable"].shape[0] / avg_hc * 100
-    non_regrettable_pct = df_exits[df_exits["exit_type"].str.lower() == "non-regrettable"].shape[0] / avg_hc * 100
-    retirement_pct = df_exits[df_exits["exit_type"].str.lower() == "retirement"].shape[0] / avg_hc * 100
+    result["skill_terms"] = wordclouds.term_frequencies(df_exits[["skills_1", "skills_2", "skills_3"]])
+    result["comp_terms"] = wordclouds.term_frequencies(df_exits["competency"])
+    return result
 
-    df_exits["exit_tenure"] = ((pd.to_datetime(df_exits["date_of_exit"]) - pd.to_datetime(df_exits["date_of_joining"])) / pd.Timedelta(days=365.25)).round(1)
-    avg_tenure_exited = df_exits["exit_tenure"].mean()
+def render(data_frames):
+    inject_report_style()
+    selected_theme()
+    if not filtered_count(data_frames):
+        st.warning("Employee data not available.")
+        return
+
+    result = cached_report(REPORT_KEY, data_frames, AS_OF, compute)
+    trend_summary = result["trend_summary"]
+    exit_type_summary = result["exit_type_summary"]
+    tenure_summary = result["tenure_summary"]
+    gender_summary = result["gender_summary"]
+    rating_summary = result["rating_summary"]
+    reason_summary = result["reason_summary"]
+    skill_terms, comp_terms = result["skill_terms"], result["comp_terms"]
+    # Word clouds render off-thread while the charts below are drawn
+    skill_cloud = wordclouds.submit(skill_terms)
+    comp_cloud = wordclouds.submit(comp_terms)
 
-    top_exit_region = df_exits["zone"].mode()[0] if not df_exits["zone"].dropna().empty else "N/A"
-    high_perf_attrition_pct = df_exits[df_exits["rating_25"].str.lower() == "excellent"].shape[0] / avg_hc * 100
-    top_talent_attrition_pct = df_exits[df_exits["top_talent"].str.lower() == "yes"].shape[0] / avg_hc * 100
+    st.markdown("<h2 style='text-align: left;'>Attrition Snapshot</h2>", unsafe_allow_html=True)
 
     col1, col2, col3, col4 = st.columns(4)
-    with col1: st.markdown(kpi("Total Attrition % (FY)", f"{attrition_pct:.1f}%"), unsafe_allow_html=True)
-    with col2: st.markdown(kpi("Regrettable Attrition %", f"{regrettable_pct:.1f}%"), unsafe_allow_html=True)
-    with col3: st.markdown(kpi("Non-Regret Attrition %", f"{non_regrettable_pct:.1f}%"), unsafe_allow_html=True)
-    with col4: st.markdown(kpi("Retirement Attrition %", f"{retirement_pct:.1f}%"), unsafe_allow_html=True)
+    with col1: st.markdown(kpi("Total Attrition % (FY)", f"{result['attrition_pct']:.1f}%"), unsafe_allow_html=True)
+    with col2: st.markdown(kpi("Regrettable Attrition %", f"{result['regrettable_pct']:.1f}%"), unsafe_allow_html=True)
+    with col3: st.markdown(kpi("Non-Regret Attrition %", f"{result['non_regrettable_pct']:.1f}%"), unsafe_allow_html=True)
+    with col4: st.markdown(kpi("Retirement Attrition %", f"{result['retirement_pct']:.1f}%"), unsafe_allow_html=True)
 
     col5, col6, col7, col8 = st.columns(4)
-    with col5: st.markdown(kpi("Avg Tenure of Exited", f"{avg_tenure_exited:.1f} yrs"), unsafe_allow_html=True)
-    with col6: st.markdown(kpi("Top Exit Region", top_exit_region), unsafe_allow_html=True)
-    with col7: st.markdown(kpi("High Perf. Attrition %", f"{high_perf_attrition_pct:.1f}%"), unsafe_allow_html=True)
-    with col8: st.markdown(kpi("Top Talent Attrition %", f"{top_talent_attrition_pct:.1f}%"), unsafe_allow_html=True)
-
-    # Chart logic reused
-    df_exits["exit_tenure"] = (
-        (pd.to_datetime(df_exits["date_of_exit"]) - pd.to_datetime(df_exits["date_of_joining"])) / pd.Timedelta(days=365.25)
-    ).round(1)
-
-    df_exits["fy_exit"] = df_exits["date_of_exit"].dt.year.apply(lambda y: f"FY-{y+1}")
-
-    # Row 1
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("### 📉 Attrition Trend")
-        trend_data = df[df["date_of_exit"].notna()].copy()
-        trend_data["fy"] = trend_data["date_of_exit"].dt.year.apply(lambda y: f"FY-{y+1}")
-        allowed_fy = [f"FY-{y}" for y in range(2022, 2027)]
-        trend_summary = (
-            trend_data["fy"]
-            .value_counts()
-            .reindex(allowed_fy, fill_value=0)
-            .reset_index()
-        )
-        trend_summary.columns = ["FY", "Exits"]
-        fig1 = px.bar(trend_summary, x="FY", y="Exits", text="Exits")
-        fig1.update_traces(textposition="outside")
-        fig1.update_layout(height=400, yaxis_range=[0, trend_summary["Exits"].max() * 1.2])
-        st.plotly_chart(fig1, use_container_width=True)
-    with col2:
-        st.markdown("### 🧾 Attrition by Exit Type")
-        exit_type_summary = df_exits["exit_type"].value_counts().reset_index()
-        exit_type_summary.columns = ["Exit Type", "Count"]
-        fig2 = px.pie(exit_type_summary, names="Exit Type", values="Count", hole=0.3)
-        fig2.update_layout(height=400)
-        st.plotly_chart(fig2, use_container_width=True)
-
-    # Row 2
-    col3, col4 = st.columns(2)
-    with col3:
-        st.markdown("### ⏳ Tenure of Exited Employees")
-        bins = [0, 1, 3, 5, 10, float("inf")]
-        labels = ["<1", "1–3", "3–5", "5–10", "10+"]
-        df_exits["Tenure Bucket"] = pd.cut(df_exits["exit_tenure"], bins=bins, labels=labels, right=False)
-        tenure_summary = df_exits["Tenure Bucket"].value_counts().reindex(labels).reset_index()
-        tenure_summary.columns = ["Bucket", "Count"]
-        fig3 = px.bar(tenure_summary, x="Bucket", y="Count", text="Count")
-        fig3.update_traces(textposition="outside")
-        fig3.update_layout(height=400, yaxis_range=[0, tenure_summary["Count"].max() * 1.2])
-        st.plotly_chart(fig3, use_container_width=True)
-    with col4:
-        st.markdown("### 👥 Attrition by Gender")
-        gender_summary = df_exits["gender"].str.title().value_counts().reset_index()
-        gender_summary.columns = ["Gender", "Count"]
-        fig4 = px.pie(gender_summary, names="Gender", values="Count")
-        fig4.update_layout(height=400)
-        st.plotly_chart(fig4, use_container_width=True)
-
-    # Row 3
-    col5, col6 = st.columns(2)
-    with col5:
-        st.markdown("### 🧾 Attrition by Rating (FY)")
-        rating_summary = df_exits["rating_25"].value_counts().reset_index()
-        rating_summary.columns = ["Rating", "Count"]
-        fig5 = px.bar(rating_summary, x="Rating", y="Count", text="Count")
-        fig5.update_traces(textposition="outside")
-        fig5.update_layout(height=400, yaxis_range=[0, rating_summary["Count"].max() * 1.2])
-        st.plotly_chart(fig5, use_container_width=True)
-    with col6:
-        st.markdown("### 🔎 Exit Reason Distribution")
-        reason_summary = df_exits["reason_for_exit"].value_counts().reset_index()
-        reason_summary.columns = ["Reason", "Count"]
-        fig6 = px.pie(reason_summary, names="Reason", values="Count", hole=0.4)
-        fig6.update_layout(height=400)
-        st.plotly_chart(fig6, use_container_width=True)
-
-    # Row 4
-    col7, col8 = st.columns(2)
-    with col7:
-        st.markdown("### 🧠 Skill Loss")
-        skill_text = " ".join(df_exits[["skills_1", "skills_2", "skills_3"]].astype(str).stack().dropna().str.lower().tolist())
-        wc1 = WordCloud(width=800, height=400, background_color="white").generate(skill_text)
-        buf1 = BytesIO(); plt.figure(figsize=(6,3)); plt.imshow(wc1); plt.axis("off"); plt.tight_layout(); plt.savefig(buf1, format="png"); buf1.seek(0)
-        img1 = base64.b64encode(buf1.read()).decode("utf-8")
-        st.markdown(f'<img src="data:image/png;base64,{img1}" width="100%">', unsafe_allow_html=True)
-
-    with col8:
-        st.markdown("### 🧭 Competency Loss")
-        comp_text = " ".join(df_exits["competency"].dropna().astype(str).str.lower().tolist())
-        wc2 = WordCloud(width=800, height=400, background_color="white").generate(comp_text)
-        buf2 = BytesIO(); plt.figure(figsize=(6,3)); plt.imshow(wc2); plt.axis("off"); plt.tight_layout(); plt.savefig(buf2, format="png"); buf2.seek(0)
-        img2 = base64.b64encode(buf2.read()).decode("utf-8")
-        st.markdown(f'<img src="data:image/png;base64,{img2}" width="100%">', unsafe_allow_html=True)
+    with col5: st.markdown(kpi("Avg Tenure of Exited", f"{result['avg_tenure_exited']:.1f} yrs"), unsafe_allow_html=True)
+    with col6: st.markdown(kpi("Top Exit Region", result["top_exit_region"]), unsafe_allow_html=True)
+    with col7: st.markdown(kpi("High Perf. Attrition %", f"{result['high_perf_attrition_pct']:.1f}%"), unsafe_allow_html=True)
+    with col8: st.markdown(kpi("Top Talent Attrition %", f"{result['top_talent_attrition_pct']:.1f}%"), unsafe_allow_html=True)
+
+    with timer("charts"):
+        # Row 1
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### 📉 Attrition Trend")
+            fig1 = px.bar(trend_summary, x="FY", y="Exits", text="Exits")
+            fig1.update_traces(textposition="outside")
+            fig1.update_layout(height=400, yaxis_range=[0, trend_summary["Exits"].max() * 1.2])
+            st.plotly_chart(fig1, use_container_width=True)
+        with col2:
+            st.markdown("### 🧾 Attrition by Exit Type")
+            fig2 = px.pie(exit_type_summary, names="Exit Type", values="Count", hole=0.3)
+            fig2.update_layout(height=400)
+            st.plotly_chart(fig2, use_container_width=True)
+
+        # Row 2
+        col3, col4 = st.columns(2)
+        with col3:
+            st.markdown("### ⏳ Tenure of Exited Employees")
+            fig3 = px.bar(tenure_summary, x="Bucket", y="Count", text="Count")
+            fig3.update_traces(textposition="outside")
+            fig3.update_layout(height=400, yaxis_range=[0, tenure_summary["Count"].max() * 1.2])
+            st.plotly_chart(fig3, use_container_width=True)
+        with col4:
+            st.markdown("### 👥 Attrition by Gender")
+            fig4 = px.pie(gender_summary, names="Gender", values="Count")
+            fig4.update_layout(height=400)
+            st.plotly_chart(fig4, use_container_width=True)
+
+        # Row 3
+        col5, col6 = st.columns(2)
+        with col5:
+            st.markdown("### 🧾 Attrition by Rating (FY)")
+            fig5 = px.bar(rating_summary, x="Rating", y="Count", text="Count")
+            fig5.update_traces(textposition="outside")
+            fig5.update_layout(height=400, yaxis_range=[0, rating_summary["Count"].max() * 1.2])
+            st.plotly_chart(fig5, use_container_width=True)
+        with col6:
+            st.markdown("### 🔎 Exit Reason Distribution")
+            fig6 = px.pie(reason_summary, names="Reason", values="Count", hole=0.4)
+            fig6.update_layout(height=400)
+            st.plotly_chart(fig6, use_container_width=True)
+
+        # Row 4
+        col7, col8 = st.columns(2)
+        with col7:
+            st.markdown("### 🧠 Skill Loss")
+            wordclouds.show(skill_cloud)
+
+        with col8:
+            st.markdown("### 🧭 Competency Loss")
+            wordclouds.show(comp_cloud)
 
 
     # === Excel Download Section ===
-    from pandas import ExcelWriter
-
     download_data = {
         "Attrition Trend": trend_summary,
         "Exit Type": exit_type_summary,
@@ -176,18 +191,8 @@ def render(data_frames):
         "Gender": gender_summary,
         "Ratings": rating_summary,
         "Exit Reasons": reason_summary,
-        "Skills": pd.DataFrame({"Skills": skill_text.split()}),
-        "Competencies": pd.DataFrame({"Competencies": comp_text.split()})
+        "Skills": counts_frame(skill_terms, ["Skill", "Count"]),
+        "Competencies": counts_frame(comp_terms, ["Competency", "Count"])
     }
 
-    def prepare_download_excel(data_dict):
-        output = BytesIO()
-        with ExcelWriter(output, engine="xlsxwriter") as writer:
-            for sheet, data in data_dict.items():
-                data.to_excel(writer, sheet_name=sheet[:31], index=False)
-        output.seek(0)
-        return output.read()
-
-    excel_data = prepare_download_excel(download_data)
-    with st.expander("📥 Download Chart Data (Excel)"):
-        st.download_button("Download All Chart Data", data=excel_data, file_name="Attrition_Charts.xlsx")
+    excel_download(download_data, "Attrition_Charts.xlsx", key="attrition_snapshot")
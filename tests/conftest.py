@@ -0,0 +1,18 @@
+# tests/conftest.py
+import pytest
+
+from benchmarks.generate_data import employee_frame
+from utils.frames import enable_copy_on_write
+from utils.schema import EMPLOYEE_SCHEMA, REQUIRED_COLUMNS, apply_schema
+
+ROWS = 20_000
+
+enable_copy_on_write()
+
+@pytest.fixture(scope="session")
+def typed_employees():
+    """A synthetic employee master, typed as the loader types it."""
+    df = employee_frame(ROWS)
+    df.columns = df.columns.str.strip().str.lower()
+    df, _ = apply_schema(df, EMPLOYEE_SCHEMA, "employee", REQUIRED_COLUMNS["employee"])
+    return df
@@ -0,0 +1,45 @@
+# tests/test_filter_index.py
+"""A filter index derived from a refresh delta matches one built from scratch."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_store import delta_positions, merge_delta
+from utils.facets import FacetEngine
+from utils.filter_index import FilterIndex
+
+def refreshed(df, removed, changed, added):
+    """``df`` without the ``removed`` rows, with ``changed`` rows moved and ``added`` joiners appended."""
+    new = df.drop(index=removed).reset_index(drop=True)
+    new["department"] = new["department"].cat.add_categories("New Department")
+    rows = new.index[changed]
+    new.loc[rows, "zone"] = new["zone"].iloc[0]
+    new.loc[rows, "department"] = "New Department"
+    joiners = new.iloc[:added].assign(employee_id=new["employee_id"].max() + 1 + np.arange(added))
+    return pd.concat([new, joiners], ignore_index=True)
+
+def assert_same_index(updated, fresh):
+    assert updated.n_rows == fresh.n_rows
+    assert list(updated.bitmaps) == list(fresh.bitmaps)
+    for column, bitmaps in fresh.bitmaps.items():
+        assert list(updated.bitmaps[column]) == list(bitmaps), column
+        for value, bitmap in bitmaps.items():
+            np.testing.assert_array_equal(updated.bitmaps[column][value], bitmap)
+
+@pytest.mark.parametrize("removed", ["none", "some", "whole band"])
+def test_updated_matches_fresh_build(typed_employees, removed):
+    old = typed_employees
+    rows = {
+        "none": [],
+        "some": [0, 5, 17, 1000],
+        "whole band": old.index[old["band"] == old["band"].value_counts().idxmin()],
+    }[removed]
+    merged, delta = merge_delta(old, refreshed(old, rows, changed=[3, 40, 41, 9000], added=25), "employee_id")
+    assert delta and len(delta.added) == 25 and len(delta.removed) == len(rows)
+
+    kept, dirty = delta_positions(old, merged, "employee_id", delta)
+    updated = FilterIndex(old).updated(merged, kept, dirty)
+    fresh = FilterIndex(merged)
+    assert_same_index(updated, fresh)
+    assert FacetEngine(updated).totals == FacetEngine(fresh).totals
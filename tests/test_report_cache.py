@@ -0,0 +1,64 @@
+# tests/test_report_cache.py
+"""Precomputed results round-trip through Parquet and a JSON manifest, and other formats are rejected."""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from utils.report_cache import PRECOMPUTED_MANIFEST, ReportCache, load_precomputed, save_precomputed
+from utils.report_compute import compute_report, employee_columns, headless_reports
+
+AS_OF = pd.Timestamp("2025-06-30")
+
+@pytest.fixture(scope="module")
+def results(typed_employees):
+    stored = {}
+    for report in headless_reports():
+        columns = employee_columns(report)
+        df = typed_employees if columns is None else typed_employees[[c for c in columns if c in typed_employees.columns]]
+        for selection in ((), (("zone", ("North",)),)):
+            key = (report, "test", selection, AS_OF)
+            stored[key] = compute_report(report, df, {column: list(values) for column, values in selection}, AS_OF)
+    return stored
+
+def test_round_trip(tmp_path, results):
+    path = str(tmp_path / "precomputed")
+    save_precomputed(results, path)
+    cache = ReportCache()
+
+    assert load_precomputed(path, cache) == len(results)
+    for key, expected in results.items():
+        loaded = cache.get(key)
+        assert loaded.keys() == expected.keys()
+        for name, value in expected.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(loaded[name], value)
+            elif isinstance(value, pd.Series):
+                pd.testing.assert_series_equal(loaded[name], value)
+            else:
+                assert loaded[name] == pytest.approx(value, nan_ok=True), name
+    files = [name for _, _, names in os.walk(path) for name in names]
+    assert not any(name.endswith(".pkl") for name in files)
+
+def test_rewrite_replaces_older_frames(tmp_path, results):
+    path = str(tmp_path / "precomputed")
+    save_precomputed(results, path)
+    save_precomputed(results, path)
+
+    assert len([name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]) == 1
+    assert load_precomputed(path, ReportCache()) == len(results)
+
+def test_other_format_is_rejected(tmp_path, results):
+    path = str(tmp_path / "precomputed")
+    save_precomputed(results, path)
+    manifest = os.path.join(path, PRECOMPUTED_MANIFEST)
+    with open(manifest) as f:
+        stored = json.load(f)
+    with open(manifest, "w") as f:
+        json.dump({**stored, "format": stored["format"] + 1}, f)
+    cache = ReportCache()
+
+    assert load_precomputed(path, cache) == 0
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,63 @@
+# tests/test_report_frames.py
+"""
+Snapshot reports compute from the shared, memory-mapped employee frame without
+copying it: the frame's column blocks are left as they were (read-only, never
+consolidated or replaced), and a compute() over warm indexes allocates less
+than one copy of the frame would.
+"""
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.report_compute import compute_report, employee_columns, headless_reports
+from utils.shared_frames import SharedFrames
+from utils.versioned import VERSION_ATTR
+
+@pytest.fixture(scope="module")
+def shared(tmp_path_factory):
+    return SharedFrames(str(tmp_path_factory.mktemp("shared")))
+
+def shared_employee(typed, shared, report):
+    """The report's employee projection, published and attached read-only as in the data store."""
+    columns = employee_columns(report)
+    df = typed if columns is None else typed[[c for c in columns if c in typed.columns]]
+    df.attrs[VERSION_ATTR] = f"test-{report}"
+    return shared.publish(report, df)
+
+def blocks(df):
+    # Block values are the column buffers; a copy or consolidation replaces them
+    return [block.values for block in df._mgr.blocks]
+
+def copied_bytes(df):
+    """Bytes a deep copy allocates: every column except the immutable Arrow strings, which it shares."""
+    usage = df.memory_usage(index=False)
+    return usage[[not isinstance(dtype, pd.StringDtype) for dtype in df.dtypes]].sum()
+
+@pytest.mark.parametrize("report", headless_reports())
+def test_compute_keeps_shared_blocks(typed_employees, shared, report):
+    employee = shared_employee(typed_employees, shared, report)
+    before = blocks(employee)
+    assert not any(isinstance(values, np.ndarray) and values.flags.writeable for values in before)
+
+    compute_report(report, employee, {"zone": ["North"]})
+    compute_report(report, employee)
+
+    after = blocks(employee)
+    assert len(after) == len(before)
+    assert all(a is b for a, b in zip(before, after))
+
+@pytest.mark.parametrize("report", headless_reports())
+def test_compute_allocates_less_than_a_frame_copy(typed_employees, shared, report):
+    employee = shared_employee(typed_employees, shared, report)
+    compute_report(report, employee)  # builds the per-version indexes, cube and derived columns
+
+    tracemalloc.start()
+    try:
+        compute_report(report, employee)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < copied_bytes(employee)
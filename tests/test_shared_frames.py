@@ -0,0 +1,52 @@
+# tests/test_shared_frames.py
+"""Shared frames round-trip without pickle, and refuse columns Arrow cannot hold."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.shared_frames import SharedFrames
+
+def assert_same_frame(shared, df):
+    # Compared as values: the shared columns are np.memmap-backed, which pandas' testing rejects
+    assert list(shared.columns) == list(df.columns)
+    assert list(shared.dtypes.astype(str)) == list(df.dtypes.astype(str))
+    for column in df.columns:
+        values = [shared[column], df[column]]
+        left, right = (series.astype(object).where(series.notna(), None).tolist() for series in values)
+        assert left == right, column
+
+def test_round_trip_without_pickle(tmp_path):
+    df = pd.DataFrame({
+        "id": np.arange(4),
+        "name": pd.array(["a", None, "c", "d"], dtype="string"),
+        "zone": pd.Categorical(["N", "S", "N", None]),
+        "score": pd.array([1, None, 3, 4], dtype="Int64"),
+        "notes": pd.Series(["x", None, "z", "w"], dtype=object),  # outside the schema
+        "cohort": pd.Categorical(pd.to_datetime(["2024-01-01", "2024-02-01", "2024-01-01", None])),
+    })
+    shared = SharedFrames(str(tmp_path)).publish("frame", df)
+
+    assert shared is not df
+    assert_same_frame(shared, df)
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert not any(name.endswith(".pkl") for name in files)
+
+def test_mixed_type_column_is_not_shared(tmp_path):
+    df = pd.DataFrame({"id": np.arange(3), "mixed": pd.Series(["a", 1, 2.5], dtype=object)})
+    store = SharedFrames(str(tmp_path))
+
+    assert store.publish("frame", df) is df
+    assert store.attach("frame") is None
+
+def test_older_format_is_replaced(tmp_path):
+    df = pd.DataFrame({"id": np.arange(3)})
+    store = SharedFrames(str(tmp_path))
+    store.publish("frame", df)
+    meta = tmp_path / "frame" / "meta.json"
+    meta.write_text(meta.read_text().replace('"format": 2', '"format": 1'))
+
+    assert store.attach("frame") is None
+    assert_same_frame(store.publish("frame", df), df)
+    assert store.attach("frame") is not None
@@ -0,0 +1,47 @@
+# tests/test_timeline.py
+"""
+Timeline and cube slices against per-period boolean masks, for month, fiscal
+quarter and fiscal year periods.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import HRCube
+from utils.timeline import Timeline, calendar_periods
+
+AS_OF = pd.Timestamp("2025-03-31")
+
+def active_on(df, date):
+    joined = df["date_of_joining"] <= date
+    return int((joined & (df["date_of_exit"].isna() | (df["date_of_exit"] > date))).sum())
+
+def in_period(dates, start, end):
+    return int(dates.between(start, end).sum())
+
+@pytest.mark.parametrize("freq, count", [("M", 36), ("Q", 12), ("FY", 3)])
+def test_calendar_periods(freq, count):
+    periods = calendar_periods("2022-04-01", "2025-03-31", freq)
+    assert len(periods) == count
+    assert periods["start"].iloc[0] == pd.Timestamp("2022-04-01")
+    assert periods["end"].iloc[-1] == pd.Timestamp("2025-03-31")
+    # Contiguous: each period starts the day after the previous one ends
+    assert (periods["start"].iloc[1:].to_numpy() == (periods["end"].iloc[:-1] + pd.Timedelta(days=1)).to_numpy()).all()
+
+@pytest.mark.parametrize("freq", ["M", "Q", "FY"])
+def test_period_queries_match_masks(typed_employees, freq):
+    df = typed_employees
+    periods = calendar_periods("2022-04-01", "2025-03-31", freq)
+    opening = np.array([active_on(df, start) for start in periods["start"]])
+    closing = np.array([active_on(df, end) for end in periods["end"]])
+    joins = [in_period(df["date_of_joining"], s, e) for s, e in zip(periods["start"], periods["end"])]
+    exits = [in_period(df["date_of_exit"], s, e) for s, e in zip(periods["start"], periods["end"])]
+
+    timeline = Timeline(df)
+    cube = HRCube(df, AS_OF).slice({}, df)
+    for engine in (timeline, cube):
+        np.testing.assert_array_equal(engine.headcount(periods["start"]), opening)
+        np.testing.assert_array_equal(engine.joins(periods["start"], periods["end"]), joins)
+        np.testing.assert_array_equal(engine.exits(periods["start"], periods["end"]), exits)
+        np.testing.assert_allclose(engine.average_headcount(periods["start"], periods["end"]), (opening + closing) / 2)
@@ -1,4 +1,7 @@
 # theme_handler.py
+import os
+from functools import lru_cache
+
 import streamlit as st
 import plotly.io as pio
 
@@ -8,4 +11,16 @@ THEME_OPTIONS = ["plotly_white", "simple_white", "presentation", "seaborn", "ggp
 def selected_theme():
     theme = st.sidebar.selectbox("🎨 Select Chart Theme", THEME_OPTIONS)
     pio.templates.default = theme
-    return theme
\ No newline at end of file
+    return theme
+
+REPORT_STYLE_PATH = "utils/report_style.css"
+
+@lru_cache(maxsize=4)
+def _read_css(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def inject_report_style(path=REPORT_STYLE_PATH):
+    """Inject the shared report CSS (file read once per mtime)."""
+    css = _read_css(path, os.stat(path).st_mtime)
+    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
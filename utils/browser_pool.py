@@ -0,0 +1,165 @@
+# utils/browser_pool.py
+"""
+HTML-to-PDF rendering through a pool of long-lived headless Chrome sessions.
+
+Browsers are started lazily (up to ``size``), checked before each use and
+replaced when they have died. Each job loads the page, waits for the load
+event and prints it with the CDP ``Page.printToPDF`` command. At most ``size``
+jobs run at once; further callers wait for a free browser.
+
+Set ``WORKLENSE_PDF_RENDERER=stub`` to use StubRenderer instead, which writes a
+placeholder PDF without starting a browser (handy for tests and machines
+without Chrome).
+"""
+
+import atexit
+import base64
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("WORKLENSE_BROWSERS", "2"))
+PAGE_LOAD_TIMEOUT = 30
+
+PRINT_OPTIONS = {
+    "landscape": False,
+    "printBackground": True,
+    "preferCSSPageSize": True,
+}
+
+def _new_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--window-size=1280,1696')
+    # driver.get() returns once the page's load event has fired
+    chrome_options.page_load_strategy = "normal"
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+def _is_alive(driver):
+    try:
+        return driver.execute_script("return 1") == 1
+    except Exception:
+        return False
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        logger.debug("Browser did not quit cleanly", exc_info=True)
+
+class BrowserPool:
+    """Up to ``size`` reusable headless Chrome sessions."""
+
+    def __init__(self, size=POOL_SIZE, driver_factory=_new_driver):
+        self.size = size
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers = []
+        self._closed = False
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    driver = self.driver_factory()
+                    with self._lock:
+                        self._drivers.append(driver)
+                    return driver
+                if _is_alive(driver):
+                    return driver
+                logger.warning("Replacing an unresponsive browser session")
+                self._discard(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, driver, healthy=True):
+        if healthy and not self._closed:
+            self._idle.put(driver)
+        else:
+            self._discard(driver)
+        self._slots.release()
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        _quit(driver)
+
+    def print_to_pdf(self, html_path, pdf_path):
+        """Render ``html_path`` to ``pdf_path``. Returns True on success."""
+        driver = self._acquire()
+        healthy = True
+        try:
+            driver.get("file://" + os.path.abspath(html_path))
+            result = driver.execute_cdp_cmd("Page.printToPDF", PRINT_OPTIONS)
+        except Exception:
+            healthy = _is_alive(driver)
+            raise
+        finally:
+            self._release(driver, healthy)
+
+        with open(pdf_path, "wb") as f:
+            f.write(base64.b64decode(result["data"]))
+        return True
+
+    def close(self):
+        """Quit every browser in the pool."""
+        self._closed = True
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            _quit(driver)
+
+class StubRenderer:
+    """Stand-in for BrowserPool that writes a one-page placeholder PDF."""
+
+    PDF = (
+        b"%PDF-1.4\n"
+        b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+        b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+        b"3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >> endobj\n"
+        b"trailer << /Root 1 0 R >>\n"
+        b"%%EOF\n"
+    )
+
+    def print_to_pdf(self, html_path, pdf_path):
+        if not os.path.exists(html_path):
+            raise FileNotFoundError(html_path)
+        with open(pdf_path, "wb") as f:
+            f.write(self.PDF)
+        return True
+
+    def close(self):
+        pass
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_pdf_renderer():
+    """The process-wide PDF renderer, created on first use."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            if os.environ.get("WORKLENSE_PDF_RENDERER", "").lower() == "stub":
+                _renderer = StubRenderer()
+            else:
+                _renderer = BrowserPool()
+            atexit.register(_renderer.close)
+        return _renderer
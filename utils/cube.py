@@ -0,0 +1,253 @@
+# utils/cube.py
+"""
+Pre-aggregated HR cube.
+
+Built once per dataset version (and report as-of date), the cube holds two
+small tables keyed by the org dimensions:
+
+* event cells  – per calendar month: hires and exits (count and CTC, with the
+  events falling on the 1st of the month split out) and raw exit counts;
+* active cells – employees not exited as of the as-of date, by age and tenure
+  bucket, with the sums behind the People KPIs (age, tenure, experience,
+  training hours, satisfaction, CTC).
+
+A filtered query sums cube cells instead of scanning employee rows. Headcount
+is exact as of any month end or month start and joins/exits over whole months;
+anything else (or a filter on a column the cube does not carry, e.g. area)
+falls back to the filtered rows through the same CubeSlice interface.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.derived_columns import get_derived_columns
+from utils.filter_index import normalize_selection
+from utils.timeline import PeriodSummary, get_timeline
+from utils.versioned import per_version
+
+CUBE_DIMENSIONS = [
+    "company", "business_unit", "zone", "function", "department",
+    "band", "employment_type", "gender",
+]
+
+# Every employee column the cube reads
+CUBE_COLUMNS = CUBE_DIMENSIONS + [
+    "date_of_joining", "date_of_exit", "date_of_birth",
+    "total_ctc_pa", "total_exp_yrs", "training_hours", "satisfaction_score",
+]
+
+AGE_BINS = [0, 20, 25, 30, 35, 40, 45, 50, 55, 60, float("inf")]
+AGE_LABELS = ["<20", "20-24", "25-29", "30-34", "35-39", "40-44", "45-49", "50-54", "55-59", "60+"]
+TENURE_BINS = [0, 0.5, 1, 3, 5, 10, float("inf")]
+TENURE_LABELS = ["0–6 Months", "6–12 Months", "1–3 Years", "3–5 Years", "5–10 Years", "10+ Years"]
+
+EVENT_MEASURES = [
+    "hc_in", "hc_in_d1", "ctc_in", "ctc_in_d1",
+    "hc_out", "hc_out_d1", "ctc_out", "ctc_out_d1",
+    "exits",
+]
+
+def _month(dates):
+    """Month ordinal (year * 12 + month - 1) of each date."""
+    return dates.dt.year * 12 + dates.dt.month - 1
+
+def _group(frame, keys):
+    return frame.groupby(keys, observed=True, dropna=False, sort=True).sum().reset_index()
+
+def event_cells(df, dims):
+    """Hire/exit events per (month, dims)."""
+    join, leave = df["date_of_joining"], df["date_of_exit"]
+    ctc = pd.to_numeric(df["total_ctc_pa"], errors="coerce").astype(float).fillna(0)
+    hired = join.notna()
+    gone = hired & leave.notna()
+    # Same convention as Timeline: an exit before joining counts on the joining date
+    effective_exit = leave.where(leave >= join, join)
+
+    def events(rows, dates, side):
+        first = (dates[rows].dt.day == 1).astype(int)
+        return df.loc[rows, dims].assign(**{
+            "month": _month(dates[rows]),
+            f"hc_{side}": 1,
+            f"hc_{side}_d1": first,
+            f"ctc_{side}": ctc[rows],
+            f"ctc_{side}_d1": ctc[rows] * first,
+        })
+
+    frames = [
+        events(hired, join, "in"),
+        events(gone, effective_exit, "out"),
+        df.loc[leave.notna(), dims].assign(month=_month(leave[leave.notna()]), exits=1),
+    ]
+    cells = pd.concat(frames, ignore_index=True)
+    cells[EVENT_MEASURES] = cells[EVENT_MEASURES].fillna(0)
+    cells["month"] = cells["month"].astype(int)
+    return _group(cells, ["month"] + dims)
+
+def active_cells(df, as_of, dims):
+    """Employees not exited as of ``as_of`` by dims, age bucket and tenure bucket."""
+    active = df[df["date_of_exit"].isna() | (df["date_of_exit"] > as_of)]
+    derived = get_derived_columns(df)
+    age = derived.get("age", as_of, rows=active)
+    tenure = derived.get("tenure_years", as_of, rows=active)
+
+    def total(column):
+        return pd.to_numeric(active[column], errors="coerce").astype(float).fillna(0)
+
+    cells = active[dims].assign(
+        age_group=derived.get("age_group", as_of, rows=active),
+        tenure_group=derived.get("tenure_group", as_of, rows=active),
+        count=1,
+        age_sum=age.fillna(0).astype(float),
+        age_n=age.notna().astype(int),
+        tenure_sum=tenure.fillna(0),
+        tenure_n=tenure.notna().astype(int),
+        exp_sum=total("total_exp_yrs"),
+        training_sum=total("training_hours"),
+        satisfaction_sum=total("satisfaction_score"),
+        ctc_sum=total("total_ctc_pa"),
+    )
+    return _group(cells, dims + ["age_group", "tenure_group"])
+
+def _select(cells, selection):
+    mask = np.ones(len(cells), dtype=bool)
+    for column, values in normalize_selection(selection):
+        mask &= cells[column].isin(values).to_numpy()
+    return cells[mask]
+
+def _month_bounds(dates):
+    """(dates, month ordinal, is month start, is month end) for scalar or array-like dates."""
+    dates = pd.to_datetime(pd.Series(np.atleast_1d(dates)))
+    return dates, _month(dates).to_numpy(), (dates.dt.day == 1).to_numpy(), dates.dt.is_month_end.to_numpy()
+
+class CubeSlice(PeriodSummary):
+    """
+    Cube cells for one filter selection, with the Timeline interface.
+
+    Dates the cells cannot answer exactly are delegated to a Timeline over
+    ``rows`` (the filtered employee frame, or a callable returning it so the
+    rows are only taken when a fallback needs them).
+    """
+
+    def __init__(self, events, active, rows=None):
+        self.events = events
+        self.active = active
+        self._rows = rows
+        per_month = events.groupby("month")[EVENT_MEASURES].sum().sort_index()
+        self._months = per_month.index.to_numpy()
+        # Row 0 of every cumulative array is "before the first month"
+        self._cum = {
+            measure: np.concatenate([[0.0], per_month[measure].to_numpy(dtype=float).cumsum()])
+            for measure in EVENT_MEASURES
+        }
+
+    @property
+    def rows(self):
+        if callable(self._rows):
+            self._rows = self._rows()
+        return self._rows
+
+    @classmethod
+    def from_rows(cls, rows, as_of, dims=CUBE_DIMENSIONS):
+        """Aggregate the filtered rows themselves (used when the cube cannot answer)."""
+        dims = [d for d in dims if d in rows.columns]
+        return cls(event_cells(rows, dims), active_cells(rows, as_of, dims), rows)
+
+    def _through(self, measure, months):
+        """Cumulative ``measure`` over all months <= each month ordinal."""
+        return self._cum[measure][np.searchsorted(self._months, months, side="right")]
+
+    def _in_month(self, measure, months):
+        return self._through(measure, months) - self._through(measure, months - 1)
+
+    def _fallback(self):
+        if self.rows is None:
+            raise ValueError("Cube cells only answer month starts/ends; no rows to fall back to.")
+        return get_timeline(self.rows)
+
+    def _as_of(self, dates, added, removed, fallback):
+        dates, months, starts, ends = _month_bounds(dates)
+        at_end = self._through(added, months) - self._through(removed, months)
+        at_start = (self._through(added, months - 1) - self._through(removed, months - 1)
+                    + self._in_month(added + "_d1", months) - self._in_month(removed + "_d1", months))
+        result = np.where(ends, at_end, at_start)
+        exact = starts | ends
+        if not exact.all():
+            result[~exact] = fallback(self._fallback())(dates[~exact])
+        return result
+
+    def headcount(self, dates):
+        """Active employees as of each date."""
+        return self._as_of(dates, "hc_in", "hc_out", lambda t: t.headcount).astype(int)
+
+    def headcount_value(self, dates):
+        """CTC of employees active as of each date."""
+        return self._as_of(dates, "ctc_in", "ctc_out", lambda t: t.headcount_value)
+
+    def _events_between(self, measure, starts, ends, fallback):
+        _, start_months, whole_start, _ = _month_bounds(starts)
+        _, end_months, _, whole_end = _month_bounds(ends)
+        if not (whole_start.all() and whole_end.all()):
+            return fallback(self._fallback())(starts, ends)
+        return (self._through(measure, end_months) - self._through(measure, start_months - 1)).astype(int)
+
+    def joins(self, starts, ends):
+        """Joins in each [start, end] period."""
+        return self._events_between("hc_in", starts, ends, lambda t: t.joins)
+
+    def exits(self, starts, ends):
+        """Exits in each [start, end] period."""
+        return self._events_between("exits", starts, ends, lambda t: t.exits)
+
+    def events_by(self, column, start, end, measure="hc_in"):
+        """
+        Event counts by ``column`` within [start, end] (whole months), e.g. joiners by
+        gender with measure="hc_in" or leavers by zone with measure="exits".
+        """
+        _, (start_month,), (whole_start,), _ = _month_bounds(start)
+        _, (end_month,), _, (whole_end,) = _month_bounds(end)
+        if not (whole_start and whole_end):
+            if self.rows is None:
+                raise ValueError("Cube events are kept per month; no rows to fall back to.")
+            date_column = "date_of_joining" if measure == "hc_in" else "date_of_exit"
+            rows = self.rows[self.rows[date_column].between(start, end)]
+            return rows[column].value_counts()
+        cells = self.events[self.events["month"].between(start_month, end_month)]
+        counts = cells.groupby(column, observed=True)[measure].sum()
+        return counts[counts > 0].astype(int)
+
+class HRCube:
+    """Cube cells for the full employee frame of one dataset version."""
+
+    def __init__(self, df, as_of, dims=CUBE_DIMENSIONS):
+        self.as_of = pd.Timestamp(as_of)
+        self.dims = [d for d in dims if d in df.columns]
+        self.events = event_cells(df, self.dims)
+        self.active = active_cells(df, self.as_of, self.dims)
+
+    def can_answer(self, selection):
+        """True when every active filter is on a cube dimension."""
+        return all(column in self.dims for column, _ in normalize_selection(selection))
+
+    def slice(self, selection, rows=None):
+        """CubeSlice of the cells matching ``selection``."""
+        return CubeSlice(_select(self.events, selection), _select(self.active, selection), rows)
+
+@per_version(maxsize=4)
+def get_cube(df, as_of):
+    """The HRCube for ``df`` as of ``as_of``, built once per dataset version."""
+    return HRCube(df, as_of)
+
+def hr_slice(data_frames, as_of):
+    """
+    CubeSlice for a report: summed from the cube when it can answer the
+    sidebar filters, otherwise aggregated from the filtered employee rows.
+    """
+    full = data_frames.get("employee_all")
+    selection = data_frames.get("filters") or {}
+    as_of = pd.Timestamp(as_of)
+    if full is not None:
+        cube = get_cube(full, as_of)
+        if cube.can_answer(selection):
+            # The filtered rows are only taken if a date falls mid-month
+            return cube.slice(selection, lambda: data_frames.get("employee"))
+    return CubeSlice.from_rows(data_frames.get("employee"), as_of)
@@ -0,0 +1,69 @@
+# utils/data_export.py
+"""
+Export of the filtered employee rows.
+
+Rows are selected with the filter index (no boolean mask over the frame),
+projected to the chosen columns and written in fixed-size chunks, so only one
+chunk is ever copied out of the source frame. CSV and Parquet are appended
+chunk by chunk; XLSX goes through the row-by-row constant_memory writer.
+"""
+
+from utils.excel_export import open_workbook, write_sheet
+from utils.filter_index import get_filter_index
+
+CHUNK_ROWS = 20_000
+
+EXPORT_FORMATS = {
+    "CSV": {"ext": "csv", "mime": "text/csv"},
+    "Excel (.xlsx)": {"ext": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "Parquet": {"ext": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+def iter_chunks(df, positions, columns, chunk_rows=CHUNK_ROWS):
+    """``df[columns]`` at ``positions``, ``chunk_rows`` rows at a time."""
+    column_positions = [df.columns.get_loc(column) for column in columns]
+    for start in range(0, len(positions), chunk_rows):
+        yield df.iloc[positions[start:start + chunk_rows], column_positions]
+
+def write_csv(chunks, output):
+    first = True
+    for chunk in chunks:
+        output.write(chunk.to_csv(index=False, header=first).encode("utf-8"))
+        first = False
+
+def write_xlsx(chunks, output):
+    workbook, formats = open_workbook(output, constant_memory=True)
+    write_sheet(workbook, "Employees", chunks, formats)
+    workbook.close()
+
+def write_parquet(chunks, output):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+def export_rows(df, filters, columns, fmt, output, chunk_rows=CHUNK_ROWS):
+    """
+    Write the rows of ``df`` matching ``filters`` (the sidebar selection) to the
+    binary file ``output`` as ``fmt`` ("csv", "xlsx" or "parquet").
+    Returns the number of rows written.
+    """
+    positions = get_filter_index(df).positions(filters)
+    columns = [column for column in columns if column in df.columns] or list(df.columns)
+    chunks = iter_chunks(df, positions, columns, chunk_rows)
+    if not len(positions):
+        chunks = iter([df.iloc[:0][columns]])  # header / schema only
+    WRITERS[fmt](chunks, output)
+    return len(positions)
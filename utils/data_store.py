@@ -0,0 +1,378 @@
+# utils/data_store.py
+"""
+Process-wide store of the datasets in data/, loaded lazily and refreshed when
+the workbooks change.
+
+Each workbook is parsed the first time a session asks for it (``snapshot()``
+returns a LazyDataset mapping); main.py prefetches the datasets the selected
+report declares, in parallel. A dataset can be requested as a column
+projection (the columns the report declares): each projection is read from the
+workbook's Parquet snapshot on its own and stored once for all sessions, so
+the full-width frame only exists when a report or export asks for it.
+
+Loaded frames are published as memory-mapped column files (utils.shared_frames)
+under ``<data folder>/.shared`` (or ``WORKLENSE_SHARED_DIR``), keyed by dataset,
+projection and workbook hash. The store hands out the mapped frame, so sessions
+share one read-only copy, and another server process (or a worker pool) that
+asks for the same version attaches to the files instead of parsing the
+workbook again. What a session adds on top is only its filtered view, which
+main.py defers until a report actually reads the rows.
+
+A background thread polls the loaded workbooks' size and mtime. When one
+changes, only that workbook is reloaded. For the employee master (keyed by
+employee_id) the new rows are merged as a delta: unchanged employees keep their
+row positions, changed rows are replaced, leavers dropped and new joiners
+appended; a re-saved workbook with identical rows keeps the current frame and
+version. Before the new version is published its filter index is derived from
+the old one and the delta (only changed and added rows are read), its facets
+are recounted from that index and its employee search index is rebuilt; the
+store then swaps in a new immutable snapshot, so sessions move to the new data
+on their next rerun without a cold load.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from data_handler import (
+    DERIVED_COLUMNS, file_content_hash, load_employee_data, load_leave_data, load_sales_data, workbook_columns,
+)
+from utils.instrumentation import count, propagate, timer
+from utils.shared_frames import SharedFrames
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.environ.get("WORKLENSE_REFRESH_SECONDS", "10"))
+SHARED_FOLDER = os.environ.get("WORKLENSE_SHARED_DIR")  # default: <data folder>/.shared
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    file_name: str
+    loader: object
+    key: str = None  # unique row key, enables delta merges
+
+DATASETS = {
+    "employee": DatasetSpec("employee_master.xlsx", load_employee_data, key="employee_id"),
+    "leave": DatasetSpec("HRMS_Leave.xlsx", load_leave_data),
+    "sales": DatasetSpec("Sales_INR.xlsx", load_sales_data),
+}
+
+@dataclass
+class DatasetDelta:
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+def merge_delta(old, new, key):
+    """
+    Merge ``new`` into ``old`` by the unique ``key`` column.
+
+    Returns (frame, delta). Rows come from ``new``, ordered as in ``old`` with
+    new keys appended; when nothing changed ``old`` itself is returned. The
+    delta is None when the frames can't be compared by key (missing or
+    duplicate keys, different columns), in which case ``new`` is returned.
+    """
+    if (key not in old.columns or key not in new.columns or list(old.columns) != list(new.columns)
+            or old[key].isna().any() or new[key].isna().any()
+            or old[key].duplicated().any() or new[key].duplicated().any()):
+        return new, None
+
+    old_hash = pd.Series(pd.util.hash_pandas_object(old, index=False).to_numpy(), index=old[key].to_numpy())
+    new_hash = pd.Series(pd.util.hash_pandas_object(new, index=False).to_numpy(), index=new[key].to_numpy())
+    common = old_hash.index.intersection(new_hash.index, sort=False)
+    delta = DatasetDelta(
+        added=new_hash.index.difference(old_hash.index, sort=False).tolist(),
+        removed=old_hash.index.difference(new_hash.index, sort=False).tolist(),
+        changed=common[old_hash[common].to_numpy() != new_hash[common].to_numpy()].tolist(),
+    )
+    if not delta:
+        return old, delta
+
+    order = old_hash.index[~old_hash.index.isin(delta.removed)]
+    if delta.added:
+        order = order.append(pd.Index(delta.added))
+    indexer = pd.Index(new[key]).get_indexer(order)
+    if (indexer == np.arange(len(new))).all():
+        return new, delta  # already in order (e.g. attached from another process's merge)
+    merged = new.take(indexer).reset_index(drop=True)
+    merged.attrs = dict(new.attrs)
+    return merged, delta
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def column_key(columns):
+    """Hashable form of a column projection (None for every column)."""
+    return None if columns is None else tuple(sorted(set(columns)))
+
+def shared_prefix(name, columns):
+    """Shared-frame key prefix of dataset ``name`` projected to ``columns`` (a column_key)."""
+    projection = "all" if columns is None else hashlib.sha1(repr(columns).encode()).hexdigest()[:12]
+    return f"{name}-{projection}-"
+
+def delta_positions(old, new, key, delta):
+    """
+    (kept, dirty) of a merge_delta result ``new``: the positions of the ``old``
+    rows it keeps, in order (None when no row was removed), and its positions
+    of changed and added rows.
+    """
+    kept = None
+    if delta.removed:
+        kept = np.flatnonzero(~old[key].isin(delta.removed).to_numpy())
+    n_kept = len(old) - len(delta.removed)
+    changed = np.flatnonzero(new[key].iloc[:n_kept].isin(delta.changed).to_numpy())
+    return kept, np.concatenate([changed, np.arange(n_kept, len(new))])
+
+def prewarm(name, df, current=None, delta=None):
+    """
+    Build the per-version structures sessions need before publishing ``df``;
+    the filter index is derived from ``current``'s when ``delta`` (from
+    merge_delta) says how ``df`` differs from it.
+    """
+    if name != "employee":
+        return
+    from utils.employee_index import get_employee_index
+    from utils.facets import FacetEngine, get_facet_engine
+    from utils.filter_index import get_filter_index
+
+    if delta is not None and current is not None and df is not current:
+        with timer("update filter index"):
+            kept, dirty = delta_positions(current, df, DATASETS[name].key, delta)
+            index = get_filter_index(current).updated(df, kept, dirty)
+        get_filter_index.prime(df, index)
+        get_facet_engine.prime(df, FacetEngine(index))
+    get_facet_engine(df)  # also builds the filter index
+    if "employee_name" in df.columns:
+        get_employee_index(df)
+
+class LazyDataset(MutableMapping):
+    """
+    {name: frame} view of a DataStore whose datasets load on first access,
+    projected to ``columns`` ({name: column list}) where given.
+    Other keys (e.g. the filtered frame main.py adds) are stored as given.
+    """
+
+    def __init__(self, store, frames, columns=None):
+        self._store = store
+        self._frames = dict(frames)
+        self._columns = dict(columns or {})
+        self._deferred = {}
+
+    def defer(self, name, factory):
+        """Set ``name`` to ``factory()``, called on first access."""
+        self._frames.pop(name, None)
+        self._deferred[name] = factory
+
+    def __getitem__(self, name):
+        if name not in self._frames:
+            if name in self._deferred:
+                self._frames[name] = self._deferred.pop(name)()
+            elif name in self._store.datasets:
+                self._frames[name] = self._store.get(name, self._columns.get(name))
+            else:
+                raise KeyError(name)
+        return self._frames[name]
+
+    def __setitem__(self, name, value):
+        self._deferred.pop(name, None)
+        self._frames[name] = value
+
+    def __delitem__(self, name):
+        if self._deferred.pop(name, None) is None:
+            del self._frames[name]
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __len__(self):
+        return len(self._names())
+
+    def _names(self):
+        return list(dict.fromkeys([*self._frames, *self._deferred, *self._store.datasets]))
+
+    @property
+    def loaded(self):
+        """Names already materialized in this mapping."""
+        return list(self._frames)
+
+class DataStore:
+    """Datasets of one data folder, loaded on demand and swapped atomically on refresh."""
+
+    def __init__(self, folder, datasets=DATASETS, poll_seconds=POLL_SECONDS, shared_folder=SHARED_FOLDER):
+        self.folder = folder
+        self.datasets = datasets
+        self.poll_seconds = poll_seconds
+        self.shared = SharedFrames(shared_folder or os.path.join(folder, ".shared"))
+        self.generation = 0
+        self._frames = {}
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in datasets}
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _path(self, name):
+        return os.path.join(self.folder, self.datasets[name].file_name)
+
+    def check(self):
+        """Raise FileNotFoundError for a missing workbook (nothing is parsed)."""
+        for name in self.datasets:
+            path = self._path(name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"File not found: {path}")
+        return self
+
+    def get(self, name, columns=None):
+        """The current frame of ``name`` (limited to ``columns``), parsing the workbook on first use."""
+        key = (name, column_key(columns))
+        frame = self._frames.get(key)
+        if frame is not None:
+            return frame
+        with self._load_locks[name]:
+            frame = self._frames.get(key)
+            if frame is None:
+                path = self._path(name)
+                signature = _signature(path)
+                frame, _ = self._load(name, key[1], path)
+                with self._lock:
+                    self._frames = {**self._frames, key: frame}
+                    self._signatures = {**self._signatures, key: signature}
+        return frame
+
+    def _load(self, name, columns, path, current=None):
+        """
+        (frame, delta) of ``name`` for the workbook at ``path``: attached from
+        the shared files when this version was published already, else parsed,
+        merged into ``current`` (on refresh) and published. ``delta`` is the
+        merge_delta result, None when nothing was merged.
+        """
+        spec = self.datasets[name]
+        prefix = shared_prefix(name, columns)
+        with timer(f"load {name}"):
+            shared_key = prefix + file_content_hash(path)[:16]
+            delta = None
+            df = self.shared.attach(shared_key)
+            if df is not None:
+                count("shared attach")
+                if spec.key and current is not None:
+                    df, delta = merge_delta(current, df, spec.key)  # keeps ``current`` when nothing changed
+                return df, delta
+
+            df = spec.loader(path, columns=columns)
+            if spec.key and current is not None:
+                df, delta = merge_delta(current, df, spec.key)
+                if delta is not None:
+                    logger.info("%s refresh: %s", name, delta)
+            with timer("publish"):
+                shared = self.shared.publish(shared_key, df, stale_prefix=prefix)
+            return (df if df is current else shared), delta
+
+    def columns(self, name):
+        """Every column of ``name`` (as loaded), without materializing the full width."""
+        frame = self._frames.get((name, None))
+        if frame is not None:
+            return list(frame.columns)
+        columns = workbook_columns(self._path(name))
+        if name == "employee":
+            columns += [derived for derived, source in DERIVED_COLUMNS.items() if source in columns]
+        return columns
+
+    def prefetch(self, names, columns=None):
+        """Load ``names`` (projected to ``columns`` {name: column list}) in parallel threads."""
+        columns = columns or {}
+        names = [name for name in dict.fromkeys(names) if name in self.datasets
+                 and (name, column_key(columns.get(name))) not in self._frames]
+        if len(names) == 1:
+            self.get(names[0], columns.get(names[0]))
+        elif names:
+            with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="data-load") as pool:
+                # Each load records into the caller's rerun trace
+                futures = [pool.submit(propagate(self.get), name, columns.get(name)) for name in names]
+                for future in futures:
+                    future.result()
+        return self
+
+    def snapshot(self, columns=None):
+        """A LazyDataset over the current frames, projected to ``columns`` (safe to mutate)."""
+        columns = columns or {}
+        with self._lock:
+            frames = {}
+            for name in self.datasets:
+                frame = self._frames.get((name, column_key(columns.get(name))))
+                if frame is not None:
+                    frames[name] = frame
+            return LazyDataset(self, frames, columns)
+
+    def refresh(self):
+        """Reload the loaded frames whose workbook signature changed; returns the names refreshed."""
+        refreshed = []
+        for key in list(self._signatures):
+            name, columns = key
+            path = self._path(name)
+            try:
+                signature = _signature(path)
+            except FileNotFoundError:
+                continue  # mid-copy or removed; keep serving the current frame
+            if signature == self._signatures.get(key):
+                continue
+            current = self._frames.get(key)
+            try:
+                df, delta = self._load(name, columns, path, current)
+            except Exception:
+                logger.warning("Keeping the current %s data; reload of %s failed", name, path, exc_info=True)
+                continue
+            prewarm(name, df, current, delta)
+            with self._lock:
+                changed = df is not current
+                self._frames = {**self._frames, key: df}
+                self._signatures = {**self._signatures, key: signature}
+                if changed:
+                    self.generation += 1
+            if changed and name not in refreshed:
+                refreshed.append(name)
+        return refreshed
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Data refresh failed")
+
+    def start_watching(self):
+        """Poll the data folder on a daemon thread (idempotent)."""
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="data-refresh", daemon=True)
+                self._watcher.start()
+        return self
+
+    def stop_watching(self):
+        self._stop.set()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_data_store(folder):
+    """The shared, watched DataStore for ``folder``."""
+    folder = os.path.abspath(folder)
+    with _stores_lock:
+        store = _stores.get(folder)
+        if store is None:
+            store = DataStore(folder).check().start_watching()
+            _stores[folder] = store
+        return store
@@ -0,0 +1,99 @@
+# utils/derived_columns.py
+"""
+Derived employee columns, computed lazily and shared.
+
+Reports used to add columns such as age or exit tenure to the frame they were
+handed (a shared, read-only frame since the data store memory-maps it). Now
+they ask the store of the full employee frame instead. Each column is computed
+once per dataset version and as-of date, over every row. A report gets the
+values for the rows it holds, looked up by index label, since filtered frames
+keep their source labels.
+"""
+
+import threading
+
+import pandas as pd
+
+from data_handler import compute_age, years_between
+from utils.versioned import per_version
+
+DERIVED = {}
+
+def derived(name):
+    """Register ``builder(df, as_of)`` as the derived column ``name``."""
+    def decorator(builder):
+        DERIVED[name] = builder
+        return builder
+    return decorator
+
+@derived("age")
+def _age(df, as_of):
+    """Completed years as of ``as_of``."""
+    return compute_age(df["date_of_birth"], as_of)
+
+@derived("age_years")
+def _age_years(df, as_of):
+    """Age in years to one decimal."""
+    return years_between(df["date_of_birth"], as_of, decimals=1)
+
+@derived("tenure_years")
+def _tenure_years(df, as_of):
+    """
+    Unrounded years of 365.25 days since joining, as the reports bucket them
+    (the loader's ``tenure`` column is 365-day years to two decimals, as of load).
+    """
+    return years_between(df["date_of_joining"], as_of)
+
+@derived("exit_tenure")
+def _exit_tenure(df, as_of):
+    """Years from joining to exit, to one decimal."""
+    return ((df["date_of_exit"] - df["date_of_joining"]) / pd.Timedelta(days=365.25)).round(1)
+
+@derived("fy_exit")
+def _fy_exit(df, as_of):
+    """April–March fiscal year of the exit, labelled FY-<end year> as in fiscal_years."""
+    exits = df["date_of_exit"]
+    end_year = exits.dt.year.astype("Int64") + (exits.dt.month >= 4).astype("Int64")
+    return ("FY-" + end_year.astype("string")).astype("category")
+
+@derived("age_group")
+def _age_group(df, as_of):
+    from utils.cube import AGE_BINS, AGE_LABELS
+
+    return pd.cut(get_derived_columns(df).get("age", as_of), bins=AGE_BINS, labels=AGE_LABELS, right=False)
+
+@derived("tenure_group")
+def _tenure_group(df, as_of):
+    from utils.cube import TENURE_BINS, TENURE_LABELS
+
+    return pd.cut(get_derived_columns(df).get("tenure_years", as_of), bins=TENURE_BINS, labels=TENURE_LABELS, right=False)
+
+class DerivedColumns:
+    """Derived columns of one employee frame, each built on first request."""
+
+    def __init__(self, df):
+        self._df = df
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, as_of=None, rows=None):
+        """
+        Derived column ``name`` as of ``as_of`` (default: today) over the whole
+        frame, or over ``rows`` (a frame taken from it) when given.
+        """
+        # Keyed on the date, so a default "today" is not reused on later days
+        as_of = pd.Timestamp("today").normalize() if as_of is None else pd.Timestamp(as_of)
+        key = (name, as_of)
+        series = self._columns.get(key)
+        if series is None:
+            series = DERIVED[name](self._df, key[1])
+            with self._lock:
+                series = self._columns.setdefault(key, series)
+        if rows is None:
+            return series
+        return series.loc[rows.index]
+
+@per_version(maxsize=4)
+def get_derived_columns(df):
+    """The DerivedColumns of ``df``, shared per dataset version."""
+    return DerivedColumns(df)
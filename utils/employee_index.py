@@ -0,0 +1,153 @@
+# utils/employee_index.py
+"""
+Employee lookup and type-ahead search.
+
+Built once per dataset version:
+
+* ``employee_id`` -> row position, a plain dict;
+* a sorted vocabulary of the lowercased words in employee_name and skills_1..3,
+  each with the row positions it occurs in, for exact and prefix matches;
+* a trigram index over that vocabulary for misspelt or partial words.
+
+A query only touches the vocabulary and the postings of the words it matches,
+never the frame itself.
+"""
+
+import bisect
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned import per_version
+
+SEARCH_COLUMNS = ["employee_name", "skills_1", "skills_2", "skills_3"]
+MIN_SIMILARITY = 0.4
+EXACT, PREFIX = 3.0, 2.0
+
+def trigrams(word):
+    """Trigrams of ``word`` padded with spaces ("ram" -> {"  r", " ra", "ram", "am "})."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class EmployeeIndex:
+    """ID map plus prefix/trigram word index over one employee frame."""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.n_rows = len(df)
+        ids = df["employee_id"] if "employee_id" in df.columns else pd.Series([pd.NA] * self.n_rows)
+        self.row_ids = ids.tolist()
+        self.ids = {}
+        for position, emp_id in enumerate(self.row_ids):
+            if pd.notna(emp_id):
+                self.ids.setdefault(int(emp_id), position)
+        self.names = (df["employee_name"].astype("string").fillna("").tolist()
+                      if "employee_name" in df.columns else [""] * self.n_rows)
+        exits = df["date_of_exit"] if "date_of_exit" in df.columns else pd.Series(pd.NaT, index=df.index)
+        self._exit_ns = pd.to_datetime(exits, errors="coerce").astype("datetime64[ns]").to_numpy()
+
+        # (word, row) pairs from every search column, one sorted posting list per word
+        words = []
+        for column in columns:
+            if column in df.columns:
+                split = df[column].astype("string").str.lower().str.split()
+                split.index = np.arange(self.n_rows)
+                words.append(split.explode().dropna())
+        pairs = pd.concat(words) if words else pd.Series(dtype=object)
+        pairs = pd.DataFrame({"word": pairs.astype(str).to_numpy(), "row": pairs.index.to_numpy(dtype=np.int64)})
+        pairs = pairs.drop_duplicates().sort_values(["word", "row"], kind="stable")
+        vocab, starts = np.unique(pairs["word"].to_numpy(dtype=object), return_index=True)
+        rows = pairs["row"].to_numpy()
+        self.vocab = vocab.tolist()
+        self.postings = np.split(rows, starts[1:]) if len(rows) else []
+
+        self._trigrams = defaultdict(list)  # trigram -> vocab ids
+        self._trigram_counts = np.zeros(len(self.vocab), dtype=np.int32)
+        for word_id, word in enumerate(self.vocab):
+            grams = trigrams(word)
+            self._trigram_counts[word_id] = len(grams)
+            for gram in grams:
+                self._trigrams[gram].append(word_id)
+        self._trigrams = {gram: np.array(ids, dtype=np.int32) for gram, ids in self._trigrams.items()}
+
+    def position(self, emp_id):
+        """Row position of ``emp_id``, or None."""
+        try:
+            return self.ids.get(int(emp_id))
+        except (TypeError, ValueError):
+            return None
+
+    def active_mask(self, as_of):
+        """Rows not exited as of ``as_of``."""
+        return np.isnat(self._exit_ns) | (self._exit_ns > np.datetime64(pd.Timestamp(as_of), "ns"))
+
+    def _word_matches(self, term):
+        """{vocab id: score} for one query word: exact, prefix, then trigram similarity."""
+        matches = {}
+        start = bisect.bisect_left(self.vocab, term)
+        for word_id in range(start, len(self.vocab)):
+            word = self.vocab[word_id]
+            if not word.startswith(term):
+                break
+            matches[word_id] = EXACT if word == term else PREFIX
+        if len(term) >= 3:
+            grams = [self._trigrams[g] for g in trigrams(term) if g in self._trigrams]
+            if grams:
+                shared = np.bincount(np.concatenate(grams), minlength=len(self.vocab))
+                candidates = np.flatnonzero(shared)
+                similarity = shared[candidates] / np.maximum(self._trigram_counts[candidates], len(trigrams(term)))
+                for word_id, score in zip(candidates, similarity):
+                    if score >= MIN_SIMILARITY:
+                        matches.setdefault(int(word_id), float(score))
+        return matches
+
+    def search(self, query, allowed=None, limit=20):
+        """
+        Row positions matching ``query`` (an employee id, or words of a name or
+        skill), best first. ``allowed`` is an optional boolean mask over rows.
+        """
+        query = str(query).strip().lower()
+        if not query:
+            return []
+        if query.isdigit():
+            position = self.position(query)
+            if position is not None and (allowed is None or allowed[position]):
+                return [position]
+
+        rows, scores = None, None
+        for term in query.split():
+            matches = self._word_matches(term)
+            if not matches:
+                return []
+            word_ids = list(matches)
+            term_rows = np.concatenate([self.postings[w] for w in word_ids])
+            term_scores = np.repeat([matches[w] for w in word_ids], [len(self.postings[w]) for w in word_ids])
+            # Best score per row for this word
+            order = np.lexsort((-term_scores, term_rows))
+            term_rows, first = np.unique(term_rows[order], return_index=True)
+            term_scores = term_scores[order][first]
+            if rows is None:
+                rows, scores = term_rows, term_scores
+            else:
+                # Every query word has to match somewhere in the row
+                rows, left, right = np.intersect1d(rows, term_rows, assume_unique=True, return_indices=True)
+                scores = scores[left] + term_scores[right]
+            if allowed is not None:
+                keep = allowed[rows]
+                rows, scores = rows[keep], scores[keep]
+            if not len(rows):
+                return []
+
+        # Best score first, then by name among the top candidates
+        top = np.argsort(-scores, kind="stable")[:limit * 5]
+        ranked = sorted(top, key=lambda i: (-scores[i], self.names[rows[i]]))
+        return [int(rows[i]) for i in ranked[:limit]]
+
+    def label(self, position):
+        """Display label for a search result."""
+        return f"{self.names[position]} ({self.row_ids[position]})"
+
+@per_version(maxsize=2)
+def get_employee_index(df):
+    """The EmployeeIndex for ``df``, built once per dataset version."""
+    return EmployeeIndex(df)
@@ -0,0 +1,109 @@
+# utils/excel_export.py
+"""
+On-demand Excel downloads.
+
+Workbooks are only built once the user asks for them, and are cached by a hash
+of the sheets' contents, so a rerun with the same aggregates reuses the bytes.
+Sheets are written row by row through xlsxwriter's constant_memory mode, which
+flushes each row to disk as soon as the next one starts, so large sheets (e.g.
+a full employee listing) are not held in memory a second time. (pandas'
+to_excel writes column by column, which constant_memory does not support.)
+"""
+
+import hashlib
+from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+from utils.instrumentation import timer
+from utils.report_cache import ReportCache
+
+WORKBOOK_CACHE = ReportCache(max_bytes=32 * 1024 * 1024)
+
+def frames_hash(sheets):
+    """Content hash of {sheet name: DataFrame}."""
+    digest = hashlib.sha256()
+    for name, frame in sheets.items():
+        digest.update(str(name).encode("utf-8"))
+        digest.update(repr(list(frame.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _cell(value):
+    """Python value for xlsxwriter, or None for a blank cell."""
+    if value is None or value is pd.NaT or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+def write_sheet(workbook, name, frames, formats):
+    """
+    Write one sheet from an iterable of DataFrame chunks sharing the same
+    columns, one row at a time.
+    """
+    sheet = workbook.add_worksheet(name[:31])
+    row = 0
+    for frame in frames:
+        if row == 0:
+            for col, column in enumerate(frame.columns):
+                sheet.write(0, col, str(column), formats["header"])
+            row = 1
+        for values in frame.itertuples(index=False, name=None):
+            for col, value in enumerate(values):
+                value = _cell(value)
+                if value is None:
+                    continue
+                if isinstance(value, datetime):
+                    sheet.write_datetime(row, col, value, formats["date"])
+                else:
+                    sheet.write(row, col, value)
+            row += 1
+    return row
+
+def open_workbook(output, constant_memory=True):
+    """xlsxwriter Workbook plus the header/date formats used by write_sheet."""
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": constant_memory})
+    formats = {
+        "header": workbook.add_format({"bold": True, "border": 1, "align": "center"}),
+        "date": workbook.add_format({"num_format": "yyyy-mm-dd"}),
+    }
+    return workbook, formats
+
+def write_workbook(sheets, output, constant_memory=True):
+    """Write each frame to its own sheet (names cut to Excel's 31 characters)."""
+    workbook, formats = open_workbook(output, constant_memory)
+    for sheet_name, df_sheet in sheets.items():
+        write_sheet(workbook, sheet_name, [df_sheet], formats)
+    workbook.close()
+
+def workbook_bytes(sheets, constant_memory=True, digest=None):
+    """The .xlsx for ``sheets`` as bytes, cached by content hash."""
+    def build():
+        output = BytesIO()
+        with timer("excel export"):
+            write_workbook(sheets, output, constant_memory)
+        return output.getvalue()
+    key = (digest or frames_hash(sheets), constant_memory)
+    return WORKBOOK_CACHE.get_or_compute(key, build)
+
+def excel_download(sheets, file_name, key, label="Download All Chart Data",
+                   title="📥 Download Chart Data (Excel)"):
+    """
+    Expander offering the workbook for download. Nothing is built until the
+    user presses "Prepare Excel"; the request is remembered for as long as the
+    sheets stay the same.
+    """
+    with st.expander(title):
+        digest = frames_hash(sheets)
+        state_key = f"excel_{key}"
+        if st.session_state.get(state_key) != digest:
+            if not st.button("Prepare Excel", key=f"{state_key}_prepare"):
+                return
+            st.session_state[state_key] = digest
+        st.download_button(label, data=workbook_bytes(sheets, digest=digest), file_name=file_name)
@@ -0,0 +1,105 @@
+# utils/export_cache.py
+"""
+Content-addressed file cache for generated exports.
+
+Files are stored as ``<key><ext>`` in one folder, where the key is a hash of
+everything the document depends on. A rerun with unchanged inputs finds the
+file and serves it as is. The folder is capped in size; the least recently
+used files are removed first (a hit refreshes the file's modification time).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def content_key(*parts):
+    """sha256 hex digest of the string form of ``parts``."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+class ExportCache:
+    """Folder of generated files keyed by content hash, capped at ``max_bytes``."""
+
+    def __init__(self, folder, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, key, ext):
+        return os.path.join(self.folder, f"{key}{ext}")
+
+    def get(self, key, ext):
+        """Path of the cached file, or None; marks the file as recently used."""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def create(self, key, ext, write):
+        """
+        Produce the file with ``write(tmp_path)`` and move it into place
+        atomically; returns its path. Evicts old files past the size cap.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(key, ext)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict(keep=path)
+        return path
+
+    def get_or_create(self, key, ext, write):
+        return self.get(key, ext) or self.create(key, ext, write)
+
+    def open(self, key, ext, write):
+        """
+        The cached file opened for binary reading, created with ``write`` when
+        missing. A file evicted between lookup and open is rebuilt; once open,
+        a later eviction no longer affects the reader.
+        """
+        try:
+            return open(self.get_or_create(key, ext, write), "rb")
+        except FileNotFoundError:
+            return open(self.create(key, ext, write), "rb")
+
+    def _evict(self, keep=None):
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.folder):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    logger.warning("Could not evict cached export %s", path, exc_info=True)
+
+    def size(self):
+        """Bytes currently held in the cache folder."""
+        if not os.path.isdir(self.folder):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.folder) if entry.is_file())
@@ -0,0 +1,72 @@
+# utils/facets.py
+"""
+Cascading filter options.
+
+For each filter dimension the facet engine returns the values still available
+and their row counts, given the selections made on the *other* dimensions.
+Counts are bitmap intersections over the FilterIndex, so nothing is re-scanned.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from utils.filter_index import get_filter_index, normalize_selection
+from utils.versioned import per_version
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(bitmap):
+    """Number of set bits in a packed uint8 bitmap."""
+    return int(_POPCOUNT[bitmap].sum())
+
+class FacetEngine:
+    """Per-dimension value counts constrained by the other active filters."""
+
+    def __init__(self, index):
+        self.index = index
+        # Unconstrained counts, used whenever no other filter is active
+        self.totals = {
+            column: {value: popcount(bitmap) for value, bitmap in bitmaps.items()}
+            for column, bitmaps in index.bitmaps.items()
+        }
+        self._cached_facets = lru_cache(maxsize=256)(self._facets)
+
+    def facets(self, selection):
+        """{column: {value: count}} where each column ignores its own selection."""
+        return self._cached_facets(normalize_selection(selection))
+
+    def _facets(self, normalized):
+        active = [(column, self.index.column_bitmap(column, values))
+                  for column, values in normalized if column in self.index.bitmaps]
+        if not active:
+            return self.totals
+
+        # AND of all active filters except the i-th, via prefix/suffix products
+        masks = [bitmap for _, bitmap in active]
+        prefix = [None]
+        for bitmap in masks[:-1]:
+            prefix.append(bitmap if prefix[-1] is None else prefix[-1] & bitmap)
+        suffix = [None]
+        for bitmap in reversed(masks[1:]):
+            suffix.append(bitmap if suffix[-1] is None else suffix[-1] & bitmap)
+        suffix.reverse()
+        all_but = {}
+        for i, (column, _) in enumerate(active):
+            left, right = prefix[i], suffix[i]
+            all_but[column] = left if right is None else right if left is None else left & right
+        everything = prefix[-1] & masks[-1] if prefix[-1] is not None else masks[-1]
+
+        result = {}
+        for column, bitmaps in self.index.bitmaps.items():
+            others = all_but.get(column, everything)
+            if others is None:
+                result[column] = self.totals[column]
+            else:
+                result[column] = {value: popcount(bitmap & others) for value, bitmap in bitmaps.items()}
+        return result
+
+@per_version()
+def get_facet_engine(df):
+    """The FacetEngine for ``df``, built once per dataset version."""
+    return FacetEngine(get_filter_index(df))
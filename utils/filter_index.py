@@ -0,0 +1,168 @@
+# utils/filter_index.py
+"""
+Row bitmaps for the sidebar filter dimensions.
+
+For every value of each filter column the index keeps a packed bitmap (one bit
+per employee row). A filter selection is then OR-ed within a column, AND-ed
+across columns and turned into row positions for a single ``take``.
+
+After a keyed refresh (utils.data_store.merge_delta) the index of the new
+version is derived from the old one with ``updated``: kept rows carry their
+bits over and only changed or added rows are re-read.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned import VERSION_ATTR, derived_version, per_version
+
+FILTER_COLUMNS = [
+    "company", "employment_type", "business_unit", "zone",
+    "area", "function", "department", "band",
+]
+
+def normalize_selection(selection):
+    """Drop empty filters and sort values so equal selections compare (and hash) equal."""
+    return tuple(
+        (column, tuple(sorted(values, key=str)))
+        for column, values in sorted((selection or {}).items())
+        if values
+    )
+
+class FilterIndex:
+    """Packed row bitmaps per value of each filter column of one dataset version."""
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for column in columns:
+            if column in df.columns:
+                self.bitmaps[column] = self._build_column(df[column])
+
+    def _build_column(self, series):
+        codes, uniques = pd.factorize(series, sort=True)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        start = int((codes < 0).sum())  # missing values sort first
+        bitmaps = {}
+        for value, count in zip(uniques, counts):
+            rows = np.zeros(self.n_rows, dtype=bool)
+            rows[order[start:start + count]] = True
+            bitmaps[value] = np.packbits(rows)
+            start += count
+        return bitmaps
+
+    def updated(self, df, kept, dirty):
+        """
+        The index of ``df`` derived from this one. ``df`` holds this index's
+        rows at positions ``kept`` (None when every row stays in place), in
+        order, followed by new rows; ``dirty`` are the positions in ``df`` of
+        changed and added rows, the only ones whose values are read.
+        """
+        index = FilterIndex.__new__(FilterIndex)
+        index.n_rows = len(df)
+        index.bitmaps = {}
+        for column in FILTER_COLUMNS:
+            if column not in df.columns:
+                continue
+            if column not in self.bitmaps:
+                index.bitmaps[column] = index._build_column(df[column])
+                continue
+            bitmaps = {value: _remap(bitmap, self.n_rows, kept, index.n_rows)
+                       for value, bitmap in self.bitmaps[column].items()}
+            for bitmap in bitmaps.values():
+                _set_bits(bitmap, dirty, False)
+            codes, uniques = pd.factorize(df[column].take(dirty))
+            for code, value in enumerate(uniques):
+                if value not in bitmaps:
+                    bitmaps[value] = index._empty()
+                _set_bits(bitmaps[value], dirty[codes == code], True)
+            # Same values, in the same order, as a fresh build
+            present = [value for value, bitmap in bitmaps.items() if bitmap.any()]
+            _, order = pd.factorize(pd.array(present, dtype=df[column].dtype), sort=True)
+            index.bitmaps[column] = {value: bitmaps[value] for value in order}
+        return index
+
+    def _empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def column_bitmap(self, column, values):
+        """Rows whose ``column`` is any of ``values``."""
+        bitmap = self._empty()
+        column_bitmaps = self.bitmaps.get(column, {})
+        for value in values:
+            if value in column_bitmaps:
+                bitmap |= column_bitmaps[value]
+        return bitmap
+
+    def bitmap(self, selection):
+        """Packed bitmap of the rows matching every active filter, or None when nothing is filtered."""
+        result = None
+        for column, values in normalize_selection(selection):
+            if column not in self.bitmaps:
+                continue
+            column_bitmap = self.column_bitmap(column, values)
+            result = column_bitmap if result is None else result & column_bitmap
+        return result
+
+    def _positions(self, bitmap):
+        if bitmap is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def mask(self, selection):
+        """Boolean row mask of ``selection`` (all True when nothing is filtered)."""
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(bitmap, count=self.n_rows).astype(bool)
+
+    def positions(self, selection):
+        """Sorted row positions matching ``selection``."""
+        return self._positions(self.bitmap(selection))
+
+    def count(self, selection):
+        """Number of rows matching ``selection``."""
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return self.n_rows
+        return int(np.unpackbits(bitmap, count=self.n_rows).sum())
+
+    def apply(self, df, selection):
+        """Filter ``df`` (the frame this index was built from) with one take."""
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return df
+        filtered = df.take(self._positions(bitmap))
+        filtered.attrs[VERSION_ATTR] = derived_version(df, "filters", normalize_selection(selection))
+        return filtered
+
+def _remap(bitmap, n_rows, kept, n_new):
+    """``bitmap`` over ``n_rows`` rows moved to the row positions ``kept`` of a frame of ``n_new`` rows."""
+    if kept is None:
+        remapped = np.zeros((n_new + 7) // 8, dtype=np.uint8)
+        remapped[:len(bitmap)] = bitmap
+        return remapped
+    bits = np.zeros(n_new, dtype=np.uint8)
+    bits[:len(kept)] = np.unpackbits(bitmap, count=n_rows)[kept]
+    return np.packbits(bits)
+
+def _set_bits(bitmap, positions, on):
+    """Set (or clear) the bits of row ``positions`` in a packed bitmap, in place."""
+    masks = (0x80 >> (positions & 7)).astype(np.uint8)
+    if on:
+        np.bitwise_or.at(bitmap, positions >> 3, masks)
+    else:
+        np.bitwise_and.at(bitmap, positions >> 3, ~masks)
+
+@per_version()
+def get_filter_index(df):
+    """The FilterIndex for ``df``, built once per dataset version."""
+    return FilterIndex(df)
+
+def filtered_count(data_frames):
+    """Rows of the session's filtered employee frame, counted on the index without taking them."""
+    full = data_frames.get("employee_all")
+    if full is None:
+        return len(data_frames.get("employee", ()))
+    return get_filter_index(full).count(data_frames.get("filters"))
@@ -0,0 +1,25 @@
+# utils/frames.py
+
+import pandas as pd
+
+def enable_copy_on_write():
+    """
+    Turn on pandas copy-on-write so slices of the shared, read-only frames are
+    views rather than copies. pandas 3 always behaves this way and deprecates
+    the option, so it is only set on older versions.
+    """
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+def counts_frame(counts, columns):
+    """
+    A value -> count Series as a two-column frame, largest first.
+    Zero counts (e.g. unused categories) are left out.
+    """
+    counts = counts[counts > 0].sort_values(ascending=False, kind="stable").reset_index()
+    counts.columns = columns
+    return counts
+
+def count_values(series, columns):
+    """value_counts() as a two-column frame, e.g. count_values(df["zone"], ["Zone", "Count"])."""
+    return counts_frame(series.value_counts(), columns)
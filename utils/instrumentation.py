@@ -0,0 +1,163 @@
+# utils/instrumentation.py
+"""
+Per-rerun stage timings.
+
+``timer(stage)`` blocks nest: a block opened inside another is recorded under
+the outer one's path (e.g. "report/compute"). ``count(name)`` bumps a counter.
+Both write into the trace of the current Streamlit rerun (``start_run`` in
+main.py). Outside a run they only cost a clock read. The trace is held in a
+context variable, so concurrent sessions don't mix. Work handed to a thread
+pool is recorded under its caller when submitted with ``propagate``.
+
+``finish_run`` appends one JSON line per rerun to a rotating local log
+(logs/timings.jsonl, ``WORKLENSE_TIMING_LOG`` to move it). Every
+``SUMMARY_EVERY`` reruns it also appends the p50/p95 of every stage over the
+last ``WINDOW`` reruns. The admin diagnostics panel in main.py shows the
+current rerun and the same percentiles.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+
+LOG_PATH = os.environ.get("WORKLENSE_TIMING_LOG", os.path.join("logs", "timings.jsonl"))
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+WINDOW = 500
+SUMMARY_EVERY = 50
+
+@dataclass
+class Trace:
+    """Stage timings and counters of one rerun."""
+    label: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    spans: list = field(default_factory=list)  # (path, start, seconds)
+    counters: dict = field(default_factory=lambda: defaultdict(int))
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, path, start, seconds):
+        with self.lock:
+            self.spans.append((path, start, seconds))
+
+    def stages(self):
+        """{"outer/inner": total seconds}, in the order the stages first started."""
+        totals, first = {}, {}
+        with self.lock:
+            spans = list(self.spans)
+        for path, start, seconds in spans:
+            totals[path] = totals.get(path, 0.0) + seconds
+            first[path] = min(first.get(path, start), start)
+        return {path: totals[path] for path in sorted(totals, key=first.get)}
+
+_current = contextvars.ContextVar("worklense_trace", default=(None, ""))
+
+@contextmanager
+def timer(stage):
+    """Time the block as ``stage``, nested under any enclosing timer."""
+    trace, parent = _current.get()
+    path = f"{parent}/{stage}" if parent else stage
+    token = _current.set((trace, path))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _current.reset(token)
+        if trace is not None:
+            trace.add(path, start, seconds)
+
+def count(name, n=1):
+    """Add ``n`` to the counter ``name`` of the current rerun."""
+    trace, _ = _current.get()
+    if trace is not None:
+        with trace.lock:
+            trace.counters[name] += n
+
+def propagate(fn):
+    """``fn`` bound to the caller's trace, for running on a pool thread."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
+
+def start_run(label=""):
+    """Begin a rerun's trace; timers in this context record into it."""
+    trace = Trace(label)
+    _current.set((trace, ""))
+    return trace
+
+# === Rolling percentiles and the JSONL log ===
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_samples_lock = threading.Lock()
+_runs = 0
+_log = None
+_log_lock = threading.Lock()
+
+def _logger():
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = _open_log()
+    return _log
+
+def _open_log():
+    log = logging.getLogger("worklense.timings")
+    if log.handlers:  # already set up, e.g. by an earlier import of this module
+        return log
+    log.propagate = False
+    try:
+        os.makedirs(os.path.dirname(LOG_PATH) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES,
+                                                       backupCount=LOG_BACKUPS, encoding="utf-8")
+    except OSError as e:
+        logging.getLogger(__name__).warning("Timing log disabled: %s", e)
+        handler = logging.NullHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    return log
+
+def percentiles():
+    """{stage: {"n", "p50", "p95"}} in seconds over the last WINDOW reruns."""
+    with _samples_lock:
+        samples = {stage: np.array(values) for stage, values in _samples.items()}
+    return {
+        stage: {"n": len(values), "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95))}
+        for stage, values in samples.items() if len(values)
+    }
+
+def finish_run(trace):
+    """Record ``trace``: rolling samples, one JSONL line, and a periodic p50/p95 summary."""
+    global _runs
+    total = time.perf_counter() - trace.started
+    stages = {"total": total, **trace.stages()}
+    with _samples_lock:
+        for stage, seconds in stages.items():
+            _samples[stage].append(seconds)
+        _runs += 1
+        summarize = _runs % SUMMARY_EVERY == 0
+
+    log = _logger()
+    now = datetime.now().isoformat(timespec="seconds")
+    log.info(json.dumps({
+        "type": "rerun", "ts": now, "label": trace.label,
+        "ms": {stage: round(seconds * 1000, 2) for stage, seconds in stages.items()},
+        "counters": dict(trace.counters),
+    }))
+    if summarize:
+        log.info(json.dumps({
+            "type": "summary", "ts": now, "window": WINDOW,
+            "ms": {stage: {"n": p["n"], "p50": round(p["p50"] * 1000, 2), "p95": round(p["p95"] * 1000, 2)}
+                   for stage, p in percentiles().items()},
+        }))
+    return stages
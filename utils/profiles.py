@@ -0,0 +1,280 @@
+# utils/profiles.py
+"""
+Talent Profile documents.
+
+Builds the profile HTML for one employee row (shared by the single-profile
+view and the bulk export) and exports many profiles as HTML/PDF pairs into a
+ZIP archive across a worker pool.
+
+Generated files live in a content-addressed cache under exports/cache, keyed by
+the employee's row, the photo's mtime, the as-of date and TEMPLATE_VERSION, so
+an unchanged profile is never rendered twice.
+"""
+
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_handler import compute_age
+from utils.export_cache import ExportCache, content_key
+from utils.instrumentation import propagate, timer
+from utils.thumbnails import circular_image_b64, photo_path
+
+EXPORT_FOLDER = "exports"
+EXPORT_WORKERS = 4
+
+# Bump whenever profile_html() output changes so cached exports are rebuilt
+TEMPLATE_VERSION = "2"
+
+PROFILE_CACHE = ExportCache(os.path.join(EXPORT_FOLDER, "cache"))
+
+def is_cloud():
+    # Detect Streamlit Cloud environment
+    return 'appuser' in os.getcwd()
+
+def format_inr(val):
+    try:
+        return f"₹ {round(val / 100000, 2)} Lakhs"
+    except:
+        return "-"
+
+def text(val):
+    return "" if pd.isna(val) else str(val).strip()
+
+def format_date(val):
+    try:
+        return pd.to_datetime(val).strftime("%d-%b-%Y")
+    except:
+        return "-"
+
+def age_and_tenure(emp, today):
+    """Display strings for the employee's age and tenure as of ``today``."""
+    age = "-"
+    tenure = "-"
+    emp_age = compute_age(pd.Series([emp["date_of_birth"]]), today).iloc[0]
+    if pd.notna(emp_age):
+        age = f"{emp_age} yrs"
+    if pd.notna(emp["date_of_joining"]):
+        delta = today - pd.Timestamp(emp["date_of_joining"])
+        years = delta.days // 365
+        months = (delta.days % 365) // 30
+        tenure = f"{years} yrs {months} months" if years > 0 else f"{months} months"
+    return age, tenure
+
+def section(emp, title, fields):
+    """One titled card of label/value rows for ``emp``."""
+    merged_skills = ', '.join(filter(None, [
+        text(emp.get('skills_1')),
+        text(emp.get('skills_2')),
+        text(emp.get('skills_3'))
+    ])) or "-"
+
+    merged_competency = " - ".join(
+        filter(None, [text(emp.get("competency_type")), text(emp.get("competency_level"))])
+    ) or "-"
+
+    s = f'<div class="section"><h4>{title}</h4>'
+    for label, key in fields:
+        val = emp.get(key, "-")
+        if pd.isna(val):
+            val = "-"
+        if key == "merged_skills":
+            val = merged_skills
+        if key == "merged_competency":
+            val = merged_competency
+        if "ctc" in key and val != "-":
+            val = format_inr(val)
+        elif any(x in key for x in ["date", "promotion", "transfer"]) and val != "-":
+            val = format_date(val)
+        elif "training" in key and val != "-":
+            val = f"{val:g} hrs"
+        elif "exp" in key and val != "-" and isinstance(val, (int, float)):
+            val = f"{val} yrs"
+        s += f'<div class="row"><div class="label">{label}</div><div class="value">{val}</div></div>'
+    s += '</div>'
+    return s
+
+def profile_html(emp, today):
+    """Complete profile HTML document for one employee row (a Series)."""
+    age, tenure = age_and_tenure(emp, today)
+    photo_b64 = circular_image_b64(emp["employee_id"])
+
+    html = f"""
+    <html><head><meta charset='utf-8'>
+    <style>
+    body {{ font-family: 'Segoe UI', sans-serif; font-size: 13px; margin: 20px; background: #f5f8fc; }}
+    .profile-header {{
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        background: #0E2A47;
+        color: white;
+        padding: 20px;
+        border-radius: 12px;
+        margin-top: 20px;
+    }}
+    .profile-info {{
+        flex-grow: 1;
+    }}
+    .profile-info h2 {{
+        margin: 0;
+        font-size: 22px;
+    }}
+    .photo {{
+        width: 120px;
+        height: 120px;
+        border-radius: 50%;
+        border: 3px solid white;
+        object-fit: cover;
+    }}
+    .gridbox {{ display: grid; grid-template-columns: 1fr 1fr; gap: 30px; margin-top: 30px; }}
+    .section {{ padding: 15px 20px; background: #ffffff; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.05); font-size: 13px; }}
+    .section h4 {{ margin-bottom: 10px; color: #0E2A47; border-bottom: 1px solid #e0e0e0; padding-bottom: 5px; }}
+    .row {{ display: flex; justify-content: space-between; border-bottom: 1px solid #f0f0f0; padding: 4px 0; }}
+    .label {{ font-weight: bold; color: #555; }}
+    .value {{ color: #000; }}
+    </style></head><body>
+
+    <div class="profile-header">
+        <div class="profile-info">
+            <h2>{emp['employee_name']}</h2>
+            <div>Employee ID: <b>{emp['employee_id']}</b></div>
+            <div>{emp['function']} | {emp['department']} | Band: {emp['band']} | Grade: {emp['grade']}</div>
+            <div>Age: {age} | Tenure: {tenure}</div>
+        </div>
+        {f"<img src='{photo_b64}' class='photo'/>" if photo_b64 else ''}
+    </div>
+    """
+
+    html += "<div class='gridbox'>" + section(emp, "Organizational Context", [
+        ("Company", "company"), ("Business Unit", "business_unit"),
+        ("Department", "department"), ("Function", "function"),
+        ("Zone", "zone"), ("Cluster", "cluster"), ("Area", "area"), ("Location", "location")
+    ]) + section(emp, "Tenure & Movement", [
+        ("Date of Joining", "date_of_joining"), ("Last Promotion", "last_promotion"),
+        ("Last Transfer", "last_transfer"), ("Total Experience", "total_exp_yrs"),
+        ("Previous Experience", "prev_exp_in_yrs"), ("Employment Type", "employment_type")
+    ]) + "</div>"
+
+    html += "<div class='gridbox'>" + section(emp, "Compensation", [
+        ("Fixed CTC", "fixed_ctc_pa"), ("Variable CTC", "variable_ctc_pa"),
+        ("Total CTC", "total_ctc_pa")
+    ]) + section(emp, "Performance & Potential", [
+        ("Satisfaction Score", "satisfaction_score"), ("Engagement Score", "engagement_score"),
+        ("Rating 2025", "rating_25"), ("Rating 2024", "rating_24"),
+        ("Top Talent", "Top Talent"), ("Succession Ready", "succession_ready")
+    ]) + "</div>"
+
+    html += "<div class='gridbox'>" + section(emp, "Development & Learning", [
+        ("Learning Program", "learning_program"), ("Training Hours", "training_hours")
+    ]) + section(emp, "Competency & Skills", [
+        ("Competency", "competency"), ("Competency Details", "merged_competency"), ("Skills", "merged_skills")
+    ]) + "</div>"
+
+    html += "<div class='gridbox'>" + section(emp, "Education & Background", [
+        ("Qualification", "qualification"), ("Highest Qualification", "highest_qualification"),
+        ("Qualification Type", "qualification_type"), ("Previous Employers", "previous_employers"),
+        ("Last Employer", "last_employer"), ("Employment Sector", "employment_sector")
+    ]) + "</div></body></html>"
+    return html
+
+def export_pdf(html_path, pdf_path):
+    """Print ``html_path`` to ``pdf_path`` with the shared browser pool."""
+    # Selenium is only imported when a PDF is actually requested
+    from utils.browser_pool import get_pdf_renderer
+    with timer("pdf"):
+        return get_pdf_renderer().print_to_pdf(html_path, pdf_path)
+
+def profile_key(emp, today):
+    """Content hash of everything a profile document depends on."""
+    photo = photo_path(emp["employee_id"])
+    photo_mtime = os.stat(photo).st_mtime_ns if photo else None
+    row = sorted((str(column), repr(value)) for column, value in emp.items())
+    return content_key(TEMPLATE_VERSION, pd.Timestamp(today).date(), photo, photo_mtime, row)
+
+def _write_text(content):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return write
+
+def cached_profile(emp, today, with_pdf=True):
+    """
+    (html_file, pdf_file) of the employee's profile opened for binary reading,
+    rendered only when no cached file matches; pdf_file is None when
+    ``with_pdf`` is False. The caller closes both.
+    """
+    key = profile_key(emp, today)
+
+    def write_html(path):
+        # Only rendered (photo included) on a cache miss
+        _write_text(profile_html(emp, today))(path)
+
+    html_file = PROFILE_CACHE.open(key, ".html", write_html)
+    pdf_file = None
+    if with_pdf:
+        try:
+            pdf_file = PROFILE_CACHE.open(
+                key, ".pdf", lambda path: export_pdf(PROFILE_CACHE.get_or_create(key, ".html", write_html), path)
+            )
+        except BaseException:
+            html_file.close()
+            raise
+    return html_file, pdf_file
+
+def _render_profile(emp, today, with_pdf):
+    """Open cached files of one profile as (file, archive name) pairs."""
+    name = f"profile_{emp['employee_id']}"
+    html_file, pdf_file = cached_profile(emp, today, with_pdf)
+    files = [(html_file, f"{name}.html")]
+    if pdf_file is not None:
+        files.append((pdf_file, f"{name}.pdf"))
+    return files
+
+def export_profiles_zip(df, today, zip_path, with_pdf=True, workers=EXPORT_WORKERS, progress=None):
+    """
+    Render every row of ``df`` into ``zip_path`` (profile_<id>.html/.pdf).
+
+    Profiles are rendered (or found in the export cache) on a worker pool and
+    each finished file is streamed from disk into the archive, so at most
+    ``workers`` profiles are pending at a time. ``progress(done, total)`` is called after
+    each profile. A profile that fails to render is left out of the archive
+    and the export carries on. Returns (profiles written, [(employee_id, error), ...]).
+    """
+    rows = [emp for _, emp in df.iterrows()]
+    total = len(rows)
+    done = 0
+    written = 0
+    failures = []
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-export") as pool:
+        pending = {}
+        remaining = iter(rows)
+
+        def submit_next():
+            emp = next(remaining, None)
+            if emp is not None:
+                pending[pool.submit(propagate(_render_profile), emp, today, with_pdf)] = emp["employee_id"]
+
+        for _ in range(workers):
+            submit_next()
+        while pending:
+            future = next(as_completed(pending))
+            employee_id = pending.pop(future)
+            try:
+                files = future.result()
+            except Exception as e:
+                failures.append((employee_id, e))
+            else:
+                for source, name in files:
+                    with source, archive.open(name, "w") as target:
+                        shutil.copyfileobj(source, target)
+                written += 1
+            done += 1
+            if progress is not None:
+                progress(done, total)
+            submit_next()
+    return written, failures
@@ -0,0 +1,243 @@
+# utils/report_cache.py
+"""
+Shared cache of report aggregates.
+
+Each report computes a small dict of KPI values and chart frames. Results are
+cached per (report, dataset version, normalized filter selection, as-of date)
+in a process-wide LRU bounded by memory, so a repeat view with the same
+sidebar filters only pays for drawing the charts.
+
+precompute.py writes results for common filter combinations to a folder next
+to the workbooks it read (``<folder>/.precomputed``, ``WORKLENSE_PRECOMPUTED``
+to move it) that ``load_precomputed`` puts into the cache when the dashboard
+starts and again whenever it is rewritten. Nothing in it is executable: every
+result frame is a Parquet file and ``manifest.json`` holds the cache keys,
+the scalar KPIs and the name of each frame's file. A manifest of another
+format version is rejected.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.filter_index import normalize_selection
+from utils.instrumentation import count, timer
+from utils.versioned import dataset_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+PRECOMPUTED_DIR = ".precomputed"
+PRECOMPUTED_MANIFEST = "manifest.json"
+PRECOMPUTED_FORMAT = 2
+
+def _size_of(value):
+    """Approximate memory held by a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(v) for v in value)
+    return sys.getsizeof(value)
+
+class ReportCache:
+    """Thread-safe LRU of report results with a byte budget and hit/miss counters."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Cached value for ``key``, calling ``compute()`` on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+REPORT_CACHE = ReportCache()
+
+def report_key(report, data_frames, as_of):
+    """Cache key for ``report`` over the session's data and sidebar filters."""
+    source = data_frames.get("employee_all")
+    if source is None:
+        source = data_frames.get("employee")
+    return (report, dataset_version(source), normalize_selection(data_frames.get("filters")), pd.Timestamp(as_of))
+
+def cached_report(report, data_frames, as_of, compute):
+    """Run ``compute(data_frames, as_of)`` through the shared report cache."""
+    key = report_key(report, data_frames, as_of)
+    value = REPORT_CACHE.get(key)
+    if value is not None:
+        count("report cache hit")
+        return value
+    count("report cache miss")
+    with timer("compute"):
+        value = compute(data_frames, as_of)
+    REPORT_CACHE.put(key, value)
+    return value
+
+# === Precomputed results ===
+
+_precomputed_mtimes = {}
+_precomputed_lock = threading.Lock()
+
+def precomputed_path(folder):
+    """Precomputed results folder for the workbooks in ``folder``."""
+    return os.environ.get("WORKLENSE_PRECOMPUTED") or os.path.join(folder, PRECOMPUTED_DIR)
+
+def _plain(value):
+    """JSON-ready form of a scalar (NumPy scalars as Python ones)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"cannot store {type(value).__name__} in the manifest")
+
+def _encode_key(key):
+    report, version, selection, as_of = key
+    return {
+        "report": report,
+        "version": version,
+        "filters": [[column, [_plain(v) for v in values]] for column, values in selection],
+        "as_of": pd.Timestamp(as_of).isoformat(),
+    }
+
+def _decode_key(entry):
+    selection = tuple((column, tuple(values)) for column, values in entry["filters"])
+    return (entry["report"], entry["version"], selection, pd.Timestamp(entry["as_of"]))
+
+def _encode_result(result, root, generation, n):
+    """Manifest entry for one result dict, writing its frames under ``root/generation``."""
+    scalars, frames = {}, {}
+    for name, value in result.items():
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            file = f"{generation}/{n}-{len(frames)}.parquet"
+            if isinstance(value, pd.Series):
+                frames[name] = {"file": file, "series": _plain(value.name)}
+                value = value.to_frame("values")
+            else:
+                frames[name] = {"file": file}
+            value.to_parquet(os.path.join(root, file))
+        else:
+            scalars[name] = _plain(value)
+    return {"scalars": scalars, "frames": frames}
+
+def _decode_result(entry, root):
+    result = dict(entry["scalars"])
+    for name, stored in entry["frames"].items():
+        value = pd.read_parquet(os.path.join(root, stored["file"]))
+        if "series" in stored:
+            value = value["values"].rename(stored["series"])
+        result[name] = value
+    return result
+
+def save_precomputed(results, path):
+    """
+    Write {cache key: result} for dashboards to preload. The frames go to a new
+    subfolder and the manifest naming them replaces the old one atomically;
+    earlier subfolders are removed after.
+    """
+    generation = f"{time.time_ns()}-{os.getpid()}"
+    os.makedirs(os.path.join(path, generation))
+    entries = []
+    for key, result in results.items():
+        try:
+            entry = _encode_result(result, path, generation, len(entries))
+        except (TypeError, ValueError) as e:
+            logger.warning("Not storing precomputed %s: %s", key[0], e)
+            continue
+        entries.append({"key": _encode_key(key), **entry})
+    manifest = os.path.join(path, PRECOMPUTED_MANIFEST)
+    tmp_path = f"{manifest}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"format": PRECOMPUTED_FORMAT, "results": entries}, f)
+    os.replace(tmp_path, manifest)
+    for name in os.listdir(path):
+        if name != generation and os.path.isdir(os.path.join(path, name)):
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+def load_precomputed(path, cache=REPORT_CACHE):
+    """
+    Put the results in the folder ``path`` into ``cache`` unless this version
+    of its manifest was loaded already. Results of an older dataset version are
+    never looked up and age out of the LRU. Returns the number of results added.
+    """
+    manifest = os.path.join(path, PRECOMPUTED_MANIFEST)
+    try:
+        mtime = os.stat(manifest).st_mtime_ns
+    except OSError:
+        return 0
+    with _precomputed_lock:
+        if _precomputed_mtimes.get(path) == mtime:
+            return 0
+        _precomputed_mtimes[path] = mtime
+        try:
+            with open(manifest) as f:
+                stored = json.load(f)
+            if not isinstance(stored, dict) or stored.get("format") != PRECOMPUTED_FORMAT:
+                logger.warning("Ignoring precomputed results %s of another format", path)
+                return 0
+            results = {_decode_key(entry["key"]): _decode_result(entry, path) for entry in stored["results"]}
+        except Exception as e:
+            logger.warning("Ignoring unreadable precomputed results %s: %s", path, e)
+            return 0
+        for key, value in results.items():
+            cache.put(key, value)
+        return len(results)
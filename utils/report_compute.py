@@ -0,0 +1,56 @@
+# utils/report_compute.py
+"""
+Headless report computation.
+
+A snapshot report keeps its KPI and aggregate logic in
+``compute(data_frames, as_of)`` (no Streamlit calls) and its render() only
+draws the result. ``compute_report`` runs that function for a plain
+(employee frame, filter selection, as-of date), e.g. from a script or a worker
+process, and returns the dict of KPI values and chart frames.
+
+``BASE_COLUMNS`` are the employee columns main.py loads for every report (ids,
+sidebar filters, HR cube) on top of the ones the report declares. A frame
+loaded with ``employee_columns(report)`` has the same dataset version as the
+dashboard's, so ``result_key`` matches the key its report cache looks up
+(see precompute.py).
+"""
+
+import pandas as pd
+
+from utils.cube import CUBE_COLUMNS
+from utils.filter_index import FILTER_COLUMNS, get_filter_index
+from utils.report_cache import report_key
+from utils.report_registry import REPORT_REGISTRY
+
+BASE_COLUMNS = ["employee_id", *FILTER_COLUMNS, *CUBE_COLUMNS]
+
+def employee_columns(report):
+    """Employee columns main.py loads for ``report`` (None for every column)."""
+    return REPORT_REGISTRY.columns(report, BASE_COLUMNS)
+
+def headless_reports():
+    """Names of the reports that define a compute() function."""
+    return [name for name in REPORT_REGISTRY.names() if hasattr(REPORT_REGISTRY.load(name), "compute")]
+
+def report_frames(employee, filters=None):
+    """The data_frames compute() reads: filtered rows, the full frame and the selection."""
+    filters = filters or {}
+    return {"employee": get_filter_index(employee).apply(employee, filters), "employee_all": employee,
+            "filters": filters}
+
+def _as_of(module, as_of):
+    return module.AS_OF if as_of is None else pd.Timestamp(as_of)
+
+def compute_report(report, employee, filters=None, as_of=None):
+    """
+    KPI values and aggregate frames of ``report`` for the ``filters``
+    ({column: [values]}) over ``employee``, as of ``as_of`` (the report's
+    AS_OF by default).
+    """
+    module = REPORT_REGISTRY.load(report)
+    return module.compute(report_frames(employee, filters), _as_of(module, as_of))
+
+def result_key(report, employee, filters=None, as_of=None):
+    """Report cache key of ``compute_report`` with the same arguments."""
+    module = REPORT_REGISTRY.load(report)
+    return report_key(module.REPORT_KEY, {"employee_all": employee, "filters": filters}, _as_of(module, as_of))
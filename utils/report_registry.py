@@ -0,0 +1,156 @@
+# utils/report_registry.py
+"""
+Registry of the report modules in ``reports/``.
+
+The folder is scanned once (and again only when its mtime changes) and each
+report is compiled and executed the first time it is opened. Later reruns reuse
+the cached module; a module is reloaded only when its file mtime changes.
+
+A report may declare a module-level ``REPORT_INFO`` literal, read with ``ast``
+so the selector never has to import the report::
+
+    REPORT_INFO = {
+        "title": "People Snapshot",
+        "datasets": ["employee"],
+        "columns": ["date_of_birth", "gender"],
+    }
+
+``columns`` lists the employee columns the report reads; main.py loads only
+those (plus the ones the sidebar and cube need). A report without the key, or
+with ``"columns": "all"``, gets every column of the employee master.
+
+``lazy_imports`` ({name: module}, e.g. ``{"px": "plotly.express"}``) binds
+heavy optional dependencies as module globals that are only imported on first
+attribute access, so compute() in a worker or a cached rerun never loads them.
+"""
+
+import ast
+import importlib.util
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+
+DEFAULT_INFO = {"datasets": ["employee"], "columns": "all"}
+
+def lazy_module(name):
+    """``name`` as a module that is only imported on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def _title_from_name(name):
+    """'1_People_Snapshot' -> 'People Snapshot'."""
+    words = name.split("_")
+    if words and words[0].isdigit():
+        words = words[1:]
+    return " ".join(words) or name
+
+def read_report_info(path):
+    """REPORT_INFO of the report at ``path`` without executing it."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    info = dict(DEFAULT_INFO, title=_title_from_name(name))
+    try:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError):
+        return info
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == "REPORT_INFO"):
+            try:
+                info.update(ast.literal_eval(node.value))
+            except ValueError:
+                pass
+    return info
+
+@dataclass
+class ReportEntry:
+    name: str
+    path: str
+    info: dict
+    mtime: float
+    module: object = field(default=None, repr=False)
+
+class ReportRegistry:
+    """Discovered reports and their cached modules."""
+
+    def __init__(self, folder="reports"):
+        self.folder = folder
+        self._entries = {}
+        self._folder_mtime = None
+        self._lock = threading.RLock()
+
+    def _scan(self):
+        folder_mtime = os.stat(self.folder).st_mtime
+        if folder_mtime == self._folder_mtime:
+            return
+        entries = {}
+        for filename in sorted(os.listdir(self.folder)):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            name = filename[:-3]
+            path = os.path.join(self.folder, filename)
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = ReportEntry(name, path, read_report_info(path), os.stat(path).st_mtime)
+            entries[name] = entry
+        self._entries = entries
+        self._folder_mtime = folder_mtime
+
+    def names(self):
+        """Report names (file stems) in selector order."""
+        with self._lock:
+            self._scan()
+            return list(self._entries)
+
+    def info(self, name):
+        """Declared metadata of report ``name``, refreshed when the file changes."""
+        return self._entry(name).info
+
+    def title(self, name):
+        return self.info(name)["title"]
+
+    def columns(self, name, base=()):
+        """Employee columns report ``name`` needs together with ``base``; None for every column."""
+        declared = self.info(name).get("columns")
+        if declared is None or declared == "all":
+            return None
+        return sorted(set(base) | set(declared))
+
+    def _entry(self, name):
+        with self._lock:
+            self._scan()
+            entry = self._entries[name]
+            mtime = os.stat(entry.path).st_mtime
+            if mtime != entry.mtime:
+                entry.info = read_report_info(entry.path)
+                entry.mtime = mtime
+                entry.module = None
+            return entry
+
+    def load(self, name):
+        """The executed module of report ``name``, compiled once per file mtime."""
+        with self._lock:
+            entry = self._entry(name)
+            if entry.module is None:
+                entry.module = self._exec(entry)
+            return entry.module
+
+    def _exec(self, entry):
+        spec = importlib.util.spec_from_file_location(f"reports.{entry.name}", entry.path)
+        module = importlib.util.module_from_spec(spec)
+        for alias, name in entry.info.get("lazy_imports", {}).items():
+            setattr(module, alias, lazy_module(name))
+        spec.loader.exec_module(module)
+        return module
+
+REPORT_REGISTRY = ReportRegistry()
@@ -0,0 +1,175 @@
+# utils/schema.py
+"""
+Declared column types for the employee, leave and sales datasets.
+
+Dimensions become ``category``, money/scores nullable ``Float64``, ids ``Int64``
+and dates ``datetime64[ns]``. Columns not listed are left as read from Excel.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "category"
+TEXT = "string"
+DATE = "datetime64[ns]"
+INT = "Int64"
+NUMBER = "Float64"
+
+EMPLOYEE_SCHEMA = {
+    "employee_id": INT,
+    "employee_name": TEXT,
+    # Dimensions
+    "company": CATEGORY,
+    "employment_type": CATEGORY,
+    "business_unit": CATEGORY,
+    "zone": CATEGORY,
+    "area": CATEGORY,
+    "cluster": CATEGORY,
+    "location": CATEGORY,
+    "function": CATEGORY,
+    "department": CATEGORY,
+    "band": CATEGORY,
+    "grade": CATEGORY,
+    "gender": CATEGORY,
+    "exit_type": CATEGORY,
+    "reason_for_exit": CATEGORY,
+    "rating_25": CATEGORY,
+    "rating_24": CATEGORY,
+    "top_talent": CATEGORY,
+    "succession_ready": CATEGORY,
+    "hiring_source": CATEGORY,
+    "highest_qualification": CATEGORY,
+    "qualification_type": CATEGORY,
+    "employment_sector": CATEGORY,
+    "competency": CATEGORY,
+    "competency_type": CATEGORY,
+    "competency_level": CATEGORY,
+    "learning_program": CATEGORY,
+    # Money, experience and scores
+    "fixed_ctc_pa": NUMBER,
+    "variable_ctc_pa": NUMBER,
+    "total_ctc_pa": NUMBER,
+    "total_exp_yrs": NUMBER,
+    "prev_exp_in_yrs": NUMBER,
+    "training_hours": NUMBER,
+    "satisfaction_score": NUMBER,
+    "engagement_score": NUMBER,
+    # Dates
+    "date_of_birth": DATE,
+    "date_of_joining": DATE,
+    "date_of_exit": DATE,
+    "last_promotion": DATE,
+    "last_transfer": DATE,
+    # Free text
+    "unique_job_role": TEXT,
+    "skills_1": TEXT,
+    "skills_2": TEXT,
+    "skills_3": TEXT,
+    "qualification": TEXT,
+    "previous_employers": TEXT,
+    "last_employer": TEXT,
+}
+
+LEAVE_SCHEMA = {
+    "employee_id": INT,
+    "employee_name": TEXT,
+    "start_date": DATE,
+    "end_date": DATE,
+    "leave_type": CATEGORY,
+    "value": NUMBER,
+}
+
+SALES_SCHEMA = {
+    "cost_center": CATEGORY,
+    "sale_date": DATE,
+    "sale_amount_inr": NUMBER,
+}
+
+# Rows missing these keys cannot be looked up or joined and are rejected.
+REQUIRED_COLUMNS = {
+    "employee": ["employee_id"],
+    "leave": ["employee_id"],
+    "sales": [],
+}
+
+@dataclass
+class SchemaReport:
+    """What apply_schema changed: memory before/after and the values it could not coerce."""
+    dataset: str
+    memory_before: int
+    memory_after: int
+    invalid_values: dict = field(default_factory=dict)
+    missing_columns: list = field(default_factory=list)
+    rejected_rows: int = 0
+
+    @property
+    def memory_saved(self):
+        return self.memory_before - self.memory_after
+
+def _blank_to_na(series):
+    """Treat empty / whitespace-only strings as missing."""
+    if series.dtype != object:
+        return series
+    return series.mask(series.map(lambda v: isinstance(v, str) and not v.strip()))
+
+def _coerce(series, dtype):
+    if dtype == CATEGORY:
+        return series.astype(CATEGORY)
+    if dtype == TEXT:
+        return series.astype(TEXT)
+    if dtype == DATE:
+        return pd.to_datetime(series, errors="coerce")
+    numbers = pd.to_numeric(series, errors="coerce")
+    if dtype == INT:
+        numbers = numbers.where(numbers % 1 == 0)
+    return numbers.astype(dtype)
+
+def apply_schema(df, schema, dataset="", required=None):
+    """Cast ``df`` to ``schema`` in place, flag uncoercible values and drop rows missing a required key.
+
+    Returns the (possibly row-filtered) frame and a SchemaReport.
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    invalid = {}
+    missing = []
+
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            missing.append(column)
+            continue
+        raw = _blank_to_na(df[column])
+        typed = _coerce(raw, dtype)
+        bad = typed.isna() & raw.notna()
+        if bad.any():
+            invalid[column] = int(bad.sum())
+        df[column] = typed
+
+    rejected = 0
+    keys = [c for c in (required or []) if c in df.columns]
+    if keys:
+        keep = df[keys].notna().all(axis=1)
+        rejected = int((~keep).sum())
+        if rejected:
+            df = df[keep].reset_index(drop=True)
+
+    report = SchemaReport(
+        dataset=dataset,
+        memory_before=memory_before,
+        memory_after=int(df.memory_usage(deep=True).sum()),
+        invalid_values=invalid,
+        missing_columns=missing,
+        rejected_rows=rejected,
+    )
+    logger.info(
+        "%s: %.1f MB -> %.1f MB after typing (saved %.1f MB)",
+        dataset, report.memory_before / 1e6, report.memory_after / 1e6, report.memory_saved / 1e6,
+    )
+    if invalid:
+        logger.warning("%s: values that could not be converted were set to missing: %s", dataset, invalid)
+    if rejected:
+        logger.warning("%s: rejected %d rows without %s", dataset, rejected, ", ".join(keys))
+    return df, report
@@ -0,0 +1,206 @@
+# utils/shared_frames.py
+"""
+Read-only frames backed by memory-mapped column files.
+
+A loaded dataset is written once per version to a folder of column buffers
+(``data/.shared/<key>/`` by default):
+
+* numeric and date columns as ``.npy`` files, plus a ``.mask.npy`` for the
+  nullable Int64/Float64 types;
+* categorical columns as their codes (``.npy``) with the categories in the
+  folder's ``meta.json``;
+* text columns in one uncompressed Arrow IPC file, exposed as
+  ``string[pyarrow]``;
+* any other column (e.g. an object column of a workbook column outside the
+  schema) in a second Arrow IPC file, converted back to pandas on attach.
+
+``attach`` rebuilds the frame on top of ``np.load(mmap_mode="r")`` and
+``pa.memory_map`` without copying the buffers, so every session in a process
+and every process on the host (other server workers, export or precompute
+pools) reads the same page-cache pages. The buffers are read-only: code that
+needs to change a column assigns a new one.
+
+Nothing is pickled: the folder lives under the data folder, and attaching must
+never run code from it. A frame with a column Arrow cannot hold (mixed Python
+types) is not shared; each process keeps its own copy.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+STRINGS_FILE = "strings.arrow"
+OTHERS_FILE = "columns.arrow"
+FORMAT_VERSION = 2
+
+def _json_categories(categories):
+    """Categories as a JSON list, or None when they are not plain str/int/float values."""
+    values = categories.tolist()
+    if all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return values
+    return None
+
+def write_frame(df, folder):
+    """Write ``df``'s columns as mappable buffers into the new directory ``folder``."""
+    os.makedirs(folder)
+    columns, strings, others = [], {}, {}
+    for position, (name, series) in enumerate(df.items()):
+        array = series.array
+        stem = f"c{position}"
+        entry = {"name": name, "file": stem}
+        if isinstance(series.dtype, pd.CategoricalDtype) and _json_categories(series.cat.categories) is not None:
+            np.save(os.path.join(folder, f"{stem}.npy"), series.cat.codes.to_numpy())
+            entry.update(kind="category", categories=_json_categories(series.cat.categories),
+                         ordered=bool(series.cat.ordered))
+        elif isinstance(array, pd.arrays.StringArray) or isinstance(series.dtype, pd.StringDtype):
+            strings[stem] = series
+            entry.update(kind="string")
+        elif isinstance(array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+            np.save(os.path.join(folder, f"{stem}.npy"), array._data)
+            np.save(os.path.join(folder, f"{stem}.mask.npy"), array._mask)
+            entry.update(kind="masked", dtype=str(series.dtype))
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufmM":
+            np.save(os.path.join(folder, f"{stem}.npy"), series.to_numpy())
+            entry.update(kind="numpy")
+        else:
+            others[stem] = series
+            entry.update(kind="arrow", dtype=str(series.dtype))
+        columns.append(entry)
+
+    if strings or others:
+        import pyarrow as pa
+
+        if strings:
+            _write_arrow(os.path.join(folder, STRINGS_FILE), {
+                stem: pa.array(series.astype(object), type=pa.large_string(), from_pandas=True)
+                for stem, series in strings.items()
+            })
+        if others:
+            # Raises ArrowInvalid/ArrowTypeError for mixed-type columns
+            _write_arrow(os.path.join(folder, OTHERS_FILE), {
+                stem: pa.array(series, from_pandas=True) for stem, series in others.items()
+            })
+
+    with open(os.path.join(folder, META_FILE), "w") as f:
+        json.dump({"format": FORMAT_VERSION, "rows": len(df), "attrs": df.attrs, "columns": columns}, f)
+
+def _write_arrow(path, arrays):
+    import pyarrow as pa
+
+    table = pa.table(arrays)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_arrow(path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+def read_frame(folder):
+    """The frame stored in ``folder``, with its buffers memory-mapped."""
+    with open(os.path.join(folder, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported shared frame format in {folder}")
+
+    kinds = {entry["kind"] for entry in meta["columns"]}
+    strings = _read_arrow(os.path.join(folder, STRINGS_FILE)) if "string" in kinds else None
+    others = _read_arrow(os.path.join(folder, OTHERS_FILE)) if "arrow" in kinds else None
+
+    def load(name):
+        return np.load(os.path.join(folder, name), mmap_mode="r")
+
+    arrays = {}
+    for entry in meta["columns"]:
+        stem, kind = entry["file"], entry["kind"]
+        if kind == "category":
+            dtype = pd.CategoricalDtype(entry["categories"], ordered=entry["ordered"])
+            array = pd.Categorical.from_codes(load(f"{stem}.npy"), dtype=dtype, validate=False)
+        elif kind == "string":
+            array = pd.arrays.ArrowStringArray(strings.column(stem))
+        elif kind == "masked":
+            array_type = pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()
+            array = array_type(load(f"{stem}.npy"), load(f"{stem}.mask.npy"))
+        elif kind == "numpy":
+            array = load(f"{stem}.npy")
+        elif kind == "arrow":
+            array = others.column(stem).to_pandas().array
+        else:
+            raise ValueError(f"Unknown column kind {kind!r} in {folder}")
+        arrays[entry["name"]] = array
+
+    # copy=False keeps one block per column instead of consolidating (and copying) them
+    df = pd.DataFrame(arrays, index=pd.RangeIndex(meta["rows"]), copy=False)
+    # Newer pandas infers a string dtype for text; keep object columns as they were written
+    objects = [entry["name"] for entry in meta["columns"] if entry.get("dtype") == "object"]
+    if objects:
+        df = df.astype(dict.fromkeys(objects, object))
+    df.attrs.update(meta["attrs"])
+    return df
+
+class SharedFrames:
+    """Folder of shared frames, one subfolder per key (dataset, projection and version)."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key)
+
+    def attach(self, key):
+        """The shared frame stored under ``key``, or None if there is none (or it is unreadable)."""
+        path = self._path(key)
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            return None
+        try:
+            return read_frame(path)
+        except Exception:
+            logger.warning("Ignoring unreadable shared frame %s", path, exc_info=True)
+            return None
+
+    def publish(self, key, df, stale_prefix=None):
+        """
+        Store ``df`` under ``key`` (unless another process already did) and
+        return the memory-mapped frame. Folders starting with ``stale_prefix``
+        (older versions of the same dataset) are removed; processes still
+        attached to them keep their mappings. Frames that cannot be shared
+        (e.g. a non-default index, an unwritable folder) are returned as given.
+        """
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            return df
+        path = self._path(key)
+        with self._lock:
+            if os.path.exists(path) and self.attach(key) is None:
+                shutil.rmtree(path, ignore_errors=True)  # an older format or a damaged folder
+            if not os.path.exists(os.path.join(path, META_FILE)):
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    os.makedirs(self.folder, exist_ok=True)
+                    write_frame(df, tmp_path)
+                    os.replace(tmp_path, path)
+                except (OSError, ValueError, TypeError) as e:  # unwritable folder, column Arrow can't hold
+                    if not os.path.exists(os.path.join(path, META_FILE)):
+                        logger.warning("Could not share %s: %s", key, e)
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                        return df
+                finally:
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+            if stale_prefix:
+                self._remove_stale(stale_prefix, keep=key)
+        shared = self.attach(key)
+        return df if shared is None else shared
+
+    def _remove_stale(self, prefix, keep):
+        for name in os.listdir(self.folder):
+            if name.startswith(prefix) and name != keep and not name.endswith(".tmp"):
+                shutil.rmtree(self._path(name), ignore_errors=True)
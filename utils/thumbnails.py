@@ -0,0 +1,130 @@
+# utils/thumbnails.py
+"""
+Circular employee photo thumbnails.
+
+Source photos in data/images are cropped and resized once; the result is
+stored as a small WebP (PNG where Pillow lacks WebP) under data/images/.thumbs,
+named by employee id and the source file's mtime. Data URIs are kept in an
+in-memory LRU, so a profile view normally touches neither the source photo nor
+the disk.
+
+Pre-warm every thumbnail after a photo drop with::
+
+    python -m utils.thumbnails [--workers N]
+"""
+
+import argparse
+import base64
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FOLDER = "data/images"
+THUMB_FOLDER = os.path.join(IMAGE_FOLDER, ".thumbs")
+PHOTO_EXTENSIONS = [".png", ".jpg", ".jpeg"]
+THUMB_SIZE = (150, 150)
+THUMB_FORMAT = "WEBP" if features.check("webp") else "PNG"
+THUMB_MIME = f"image/{THUMB_FORMAT.lower()}"
+
+_photos = {}  # employee id (str) -> source path
+_photos_mtime = None
+_photos_lock = threading.Lock()
+
+def _photo_index(folder=IMAGE_FOLDER):
+    """{employee id: photo path}, re-listed only when the folder changes."""
+    global _photos, _photos_mtime
+    try:
+        mtime = os.stat(folder).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _photos_lock:
+        if mtime != _photos_mtime:
+            photos = {}
+            names = set(os.listdir(folder))
+            # Same precedence as before: .png, then .jpg, then .jpeg
+            for ext in reversed(PHOTO_EXTENSIONS):
+                for name in names:
+                    if name.endswith(ext):
+                        photos[name[:-len(ext)]] = os.path.join(folder, name)
+            _photos, _photos_mtime = photos, mtime
+        return _photos
+
+def photo_path(empid):
+    """The employee's source photo in data/images, or None."""
+    return _photo_index().get(str(empid))
+
+def create_circular_image(path, size=THUMB_SIZE):
+    img = Image.open(path).convert("RGBA").resize(size)
+    mask = Image.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0) + size, fill=255)
+    output = ImageOps.fit(img, size, centering=(0.5, 0.5))
+    output.putalpha(mask)
+    return output
+
+def thumbnail_path(empid, source_mtime_ns):
+    return os.path.join(THUMB_FOLDER, f"{empid}_{source_mtime_ns}.{THUMB_FORMAT.lower()}")
+
+def ensure_thumbnail(source, empid):
+    """Path of the thumbnail for ``source``, creating it if missing."""
+    mtime = os.stat(source).st_mtime_ns
+    path = thumbnail_path(empid, mtime)
+    if not os.path.exists(path):
+        os.makedirs(THUMB_FOLDER, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        create_circular_image(source).save(tmp_path, format=THUMB_FORMAT)
+        os.replace(tmp_path, path)
+        _remove_stale(empid, keep=path)
+    return path
+
+def _remove_stale(empid, keep):
+    """Drop thumbnails of older versions of the employee's photo."""
+    prefix = f"{empid}_"
+    for name in os.listdir(THUMB_FOLDER):
+        path = os.path.join(THUMB_FOLDER, name)
+        if name.startswith(prefix) and path != keep and not name.endswith(".tmp"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@lru_cache(maxsize=1024)
+def _data_uri(source, empid, source_mtime_ns):
+    with open(ensure_thumbnail(source, empid), "rb") as f:
+        return f"data:{THUMB_MIME};base64,{base64.b64encode(f.read()).decode()}"
+
+def circular_image_b64(empid):
+    """Data URI of the employee's circular thumbnail, or "" when there is no photo."""
+    source = photo_path(empid)
+    if source is None:
+        return ""
+    return _data_uri(source, str(empid), os.stat(source).st_mtime_ns)
+
+def _warm(source, empid):
+    ensure_thumbnail(source, empid)
+    return empid
+
+def prewarm(workers=None):
+    """Build every missing thumbnail in parallel; returns the number of photos."""
+    photos = _photo_index()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for empid in pool.map(_warm, photos.values(), photos.keys(), chunksize=16):
+            logger.debug("Thumbnail ready for %s", empid)
+    return len(photos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build circular photo thumbnails for data/images.")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    count = prewarm(args.workers)
+    print(f"{count} thumbnails ready in {THUMB_FOLDER}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# utils/timeline.py
+"""
+Headcount and attrition over time from sorted join/exit dates.
+
+Instead of re-masking the whole frame for every period, the timeline keeps the
+join and exit dates sorted (with cumulative CTC alongside) and answers any
+number of "as of" dates or [start, end] periods with ``searchsorted``.
+
+Conventions match the reports: an employee is active on date D when they joined
+on or before D and have no exit date or exited after D; joins and exits in a
+period count both end dates.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned import per_version
+
+def _to_ns(values):
+    """Dates (scalar or array-like) as int64 nanoseconds plus a missing-date mask."""
+    dates = pd.to_datetime(pd.Series(np.atleast_1d(values)), errors="coerce").astype("datetime64[ns]")
+    return dates.to_numpy().view("i8"), dates.isna().to_numpy()
+
+def _count_le(sorted_ns, dates_ns):
+    return np.searchsorted(sorted_ns, dates_ns, side="right")
+
+def _count_lt(sorted_ns, dates_ns):
+    return np.searchsorted(sorted_ns, dates_ns, side="left")
+
+def fiscal_years(first, last):
+    """April–March fiscal years ``first``..``last`` labelled FY-<end year>."""
+    years = range(first, last + 1)
+    return pd.DataFrame({
+        "Period": [f"FY-{yr + 1}" for yr in years],
+        "start": pd.to_datetime([f"{yr}-04-01" for yr in years]),
+        "end": pd.to_datetime([f"{yr + 1}-03-31" for yr in years]),
+    })
+
+def calendar_periods(start, end, freq="M"):
+    """
+    Months ("M"), fiscal quarters ("Q") or fiscal years ("FY") covering
+    ``start``..``end``, as a Period/start/end frame like fiscal_years.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if freq == "FY":
+        return fiscal_years(start.year - (start.month < 4), end.year - (end.month < 4))
+    if freq not in ("M", "Q"):
+        raise ValueError(f"Unknown period frequency {freq!r}; use 'M', 'Q' or 'FY'")
+    periods = pd.period_range(start, end, freq="Q-MAR" if freq == "Q" else "M")
+    if freq == "Q":
+        labels = "FY-" + periods.qyear.astype(str) + " Q" + periods.quarter.astype(str)
+    else:
+        labels = periods.strftime("%b-%Y")
+    return pd.DataFrame({
+        "Period": np.asarray(labels),
+        "start": periods.start_time,
+        "end": periods.end_time.normalize(),
+    })
+
+class PeriodSummary:
+    """
+    Period roll-ups shared by Timeline and the cube slices; subclasses provide
+    headcount, headcount_value, joins and exits.
+    """
+
+    def average_headcount(self, starts, ends):
+        """(opening + closing) / 2 per [start, end] period."""
+        return (self.headcount(starts) + self.headcount(ends)) / 2
+
+    def summary(self, periods):
+        """
+        One row per period (a frame with Period/start/end, e.g. from fiscal_years):
+        Opening, Closing, Joins, Exits, Average Headcount, Closing CTC and Attrition %.
+        """
+        opening = self.headcount(periods["start"])
+        closing = self.headcount(periods["end"])
+        exits = self.exits(periods["start"], periods["end"])
+        average = (opening + closing) / 2
+        # Same guard as the reports: an empty period divides by 1
+        divisor = np.where(opening + closing > 0, average, 1)
+        return pd.DataFrame({
+            "Period": periods["Period"].to_numpy(),
+            "Opening": opening,
+            "Closing": closing,
+            "Joins": self.joins(periods["start"], periods["end"]),
+            "Exits": exits,
+            "Average Headcount": average,
+            "Closing CTC": self.headcount_value(periods["end"]),
+            "Attrition %": np.round(exits / divisor * 100, 1),
+        })
+
+class Timeline(PeriodSummary):
+    """Vectorized headcount, joins, exits and CTC for one employee frame."""
+
+    def __init__(self, df, value_column="total_ctc_pa"):
+        join_ns, join_missing = _to_ns(df["date_of_joining"])
+        exit_ns, exit_missing = _to_ns(df["date_of_exit"])
+        if value_column in df.columns:
+            values = pd.to_numeric(df[value_column], errors="coerce").astype(float).fillna(0).to_numpy()
+        else:
+            values = np.zeros(len(df))
+
+        # Joins/exits as events: every dated row counts
+        self._joins = np.sort(join_ns[~join_missing])
+        self._exits = np.sort(exit_ns[~exit_missing])
+
+        # Headcount: only rows with a joining date; an exit before joining is
+        # treated as an exit on the joining date so the row never goes negative
+        hired = ~join_missing
+        hc_join, hc_values = join_ns[hired], values[hired]
+        gone = hired & ~exit_missing
+        hc_exit = np.maximum(exit_ns[gone], join_ns[gone])
+        exit_values = values[gone]
+
+        order = np.argsort(hc_join, kind="stable")
+        self._hc_join = hc_join[order]
+        self._hc_join_value = np.concatenate([[0.0], np.cumsum(hc_values[order])])
+        order = np.argsort(hc_exit, kind="stable")
+        self._hc_exit = hc_exit[order]
+        self._hc_exit_value = np.concatenate([[0.0], np.cumsum(exit_values[order])])
+
+    def headcount(self, dates):
+        """Active employees as of each date."""
+        dates_ns, _ = _to_ns(dates)
+        return _count_le(self._hc_join, dates_ns) - _count_le(self._hc_exit, dates_ns)
+
+    def headcount_value(self, dates):
+        """Sum of the value column (CTC) over employees active as of each date."""
+        dates_ns, _ = _to_ns(dates)
+        return (self._hc_join_value[_count_le(self._hc_join, dates_ns)]
+                - self._hc_exit_value[_count_le(self._hc_exit, dates_ns)])
+
+    def joins(self, starts, ends):
+        """Joins with start <= date_of_joining <= end, per period."""
+        starts_ns, _ = _to_ns(starts)
+        ends_ns, _ = _to_ns(ends)
+        return _count_le(self._joins, ends_ns) - _count_lt(self._joins, starts_ns)
+
+    def exits(self, starts, ends):
+        """Exits with start <= date_of_exit <= end, per period."""
+        starts_ns, _ = _to_ns(starts)
+        ends_ns, _ = _to_ns(ends)
+        return _count_le(self._exits, ends_ns) - _count_lt(self._exits, starts_ns)
+
+@per_version(maxsize=8)
+def get_timeline(df):
+    """The Timeline for ``df``, built once per dataset version (or filtered slice)."""
+    return Timeline(df)
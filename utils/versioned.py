@@ -0,0 +1,71 @@
+# utils/versioned.py
+"""
+Dataset versions and a small cache for structures built once per version.
+
+A loaded frame carries its version in ``df.attrs["dataset_version"]`` (the
+source workbook's content hash, set by data_handler). Indexes, cubes and other
+derived structures are cached per (version, row count) so every session reuses
+the same build until the data changes.
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+VERSION_ATTR = "dataset_version"
+
+def dataset_version(df):
+    """Return the frame's dataset version, hashing its contents once if it has none."""
+    version = df.attrs.get(VERSION_ATTR)
+    if version is None:
+        hashed = pd.util.hash_pandas_object(df, index=True).values
+        version = hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+        df.attrs[VERSION_ATTR] = version
+    return version
+
+def derived_version(df, *parts):
+    """Version string for a frame derived from ``df`` (e.g. a filtered slice)."""
+    key = repr(parts).encode()
+    return f"{dataset_version(df)}:{hashlib.sha1(key).hexdigest()[:12]}"
+
+def per_version(maxsize=2):
+    """
+    Cache ``builder(df, *args)`` per dataset version of ``df``.
+
+    Only the last ``maxsize`` versions are kept, so a data refresh releases the
+    structures built for the old data.
+    """
+    def decorator(builder):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(builder)
+        def wrapper(df, *args):
+            key = (dataset_version(df), len(df), args)
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            value = builder(df, *args)
+            with lock:
+                cache[key] = value
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def prime(df, value, *args):
+            """Store ``value`` as the result for ``df`` (e.g. one derived incrementally)."""
+            key = (dataset_version(df), len(df), args)
+            with lock:
+                cache[key] = value
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+        wrapper.cache_clear = cache.clear
+        wrapper.prime = prime
+        return wrapper
+    return decorator
@@ -0,0 +1,94 @@
+# utils/wordclouds.py
+"""
+Word cloud images for the snapshot reports.
+
+Term frequencies come straight from ``value_counts`` and are drawn with
+``WordCloud.generate_from_frequencies`` (no matplotlib figure). PNGs are cached
+by a hash of the frequency table and rendered on a small thread pool, so a
+report can submit its clouds first and draw the rest of the page meanwhile.
+"""
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentation import propagate, timer
+
+WIDTH, HEIGHT = 800, 400
+MAX_CACHED = 64
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="wordcloud")
+_cache = OrderedDict()  # frequency hash -> PNG bytes
+_lock = threading.Lock()
+
+def term_frequencies(values):
+    """
+    Word counts over one or more text columns (a Series or DataFrame),
+    lowercased and without the WordCloud stopwords, most frequent first.
+    """
+    from wordcloud import STOPWORDS
+
+    if isinstance(values, pd.DataFrame):
+        values = values.stack()
+    words = values.dropna().astype(str).str.lower().str.split().explode().dropna()
+    words = words[~words.isin(STOPWORDS)]
+    counts = words.value_counts()
+    counts.index.name = None
+    return counts
+
+def frequency_hash(freqs):
+    """Content hash of a frequency table (term -> count)."""
+    digest = hashlib.sha256()
+    for term, count in sorted(freqs.items()):
+        digest.update(f"{term}\t{count}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def _render(freqs, width, height):
+    from wordcloud import WordCloud
+
+    cloud = WordCloud(width=width, height=height, background_color="white", random_state=0)
+    image = cloud.generate_from_frequencies(freqs).to_image()
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def render_png(freqs, width=WIDTH, height=HEIGHT):
+    """PNG bytes of the cloud for ``freqs``, or None when there are no terms."""
+    freqs = {str(term): int(count) for term, count in dict(freqs).items() if count > 0}
+    if not freqs:
+        return None
+    key = (frequency_hash(freqs), width, height)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    with timer("word cloud render"):
+        png = _render(freqs, width, height)
+    with _lock:
+        _cache[key] = png
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return png
+
+def submit(freqs, width=WIDTH, height=HEIGHT):
+    """Render on the word cloud thread pool; returns a Future of the PNG bytes (or None)."""
+    return _executor.submit(propagate(render_png), freqs, width, height)
+
+def image_html(png):
+    """<img> tag embedding ``png``, full width."""
+    return f'<img src="data:image/png;base64,{base64.b64encode(png).decode()}" width="100%">'
+
+def show(future):
+    """Draw a submitted cloud, or a note when there was nothing to draw."""
+    with timer("word clouds"):
+        png = future.result()
+    if png is None:
+        st.info("No data available for the word cloud.")
+    else:
+        st.markdown(image_html(png), unsafe_allow_html=True)